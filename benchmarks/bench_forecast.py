@@ -0,0 +1,63 @@
+"""Forecast cost at scale: one batched pass vs a loop over series.
+
+Fits both models (seasonal naive and the Holt-Winters grid) for every series
+of a synthetic dataset in one ``forecast.compute`` call, then times the same
+code called one series at a time on a sample and extrapolates to all series.
+Also times writing and reading the stored forecasts, what a worker does
+instead of fitting.
+
+    python benchmarks/bench_forecast.py --series 10000 --months 120 --sample 200
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import forecast  # noqa: E402
+from synthetic import generate_frames  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", type=int, default=10000)
+    parser.add_argument("--months", type=int, default=120)
+    parser.add_argument("--sample", type=int, default=200, help="series fitted one at a time")
+    args = parser.parse_args(argv)
+
+    df, _ = generate_frames(args.series, args.months)
+    values = df.iloc[:, 1:].to_numpy(dtype=np.float64)
+    labels = [f"series {k}" for k in range(args.series)]
+    print(f"{args.series} series x {args.months} months, horizon {forecast.HORIZON}, "
+          f"{len(forecast.GRID)} Holt-Winters candidates")
+
+    start = time.perf_counter()
+    batched = forecast.compute("bench", labels, values)
+    batched_s = time.perf_counter() - start
+    print(f"batched          {batched_s:>8.2f} s  ({len(batched.origins)} origins)")
+
+    sample = np.linspace(0, args.series - 1, min(args.sample, args.series)).astype(int)
+    start = time.perf_counter()
+    single = [forecast.compute("bench", [labels[k]], values[k:k + 1]) for k in sample]
+    loop_s = (time.perf_counter() - start) / len(sample) * args.series
+    print(f"per series loop  {loop_s:>8.2f} s  (extrapolated from {len(sample)} series, "
+          f"{loop_s / batched_s:.0f}x)")
+    difference = max(np.abs(one.holt_winters[:, 0] - batched.holt_winters[:, k]).max()
+                     for one, k in zip(single, sample))
+    print(f"max difference   {difference:.2e}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        target = forecast.save(batched, directory)
+        saved_s = time.perf_counter() - start
+        start = time.perf_counter()
+        forecast.load("bench", directory)
+        print(f"save {saved_s:.2f} s, load {time.perf_counter() - start:.2f} s, {target.stat().st_size / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
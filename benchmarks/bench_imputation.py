@@ -0,0 +1,53 @@
+"""Gap filling and anomaly flags: time per matrix size, to check it scales linearly.
+
+Runs ``imputation.impute`` on synthetic matrices with a share of the cells
+zeroed (a CBK reporting gap) and every strategy in use, and prints the time
+per million cells, which stays flat when the work is linear in the matrix.
+
+    python benchmarks/bench_imputation.py --series 33 1000 10000 --months 75 600 --gaps 0.01
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from imputation import STRATEGY_NAMES, impute  # noqa: E402
+from synthetic import generate_frames  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", type=int, nargs="+", default=[33, 1000, 10000])
+    parser.add_argument("--months", type=int, nargs="+", default=[75, 600])
+    parser.add_argument("--gaps", type=float, default=0.01, help="share of cells reported as 0")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"{'series':>8}{'months':>8}{'filled':>10}{'anomalies':>11}{'ms':>10}{'ms/Mcell':>10}")
+    for months in args.months:
+        for n_series in args.series:
+            df, _ = generate_frames(n_series, months)
+            values = df.iloc[:, 1:].to_numpy(dtype=np.float64)
+            values[rng.random(values.shape) < args.gaps] = 0.0
+            labels = df.iloc[:, 0].tolist()
+            # every strategy in use, one per series in turn, and every 0 a gap
+            strategies = {label.strip().casefold(): STRATEGY_NAMES[k % len(STRATEGY_NAMES)]
+                          for k, label in enumerate(labels)}
+            zero_is_missing = dict.fromkeys(strategies, True)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = impute(values, labels, strategies, zero_is_missing=zero_is_missing)
+                timings.append(time.perf_counter() - start)
+            ms = min(timings) * 1000
+            print(f"{n_series:>8}{months:>8}{int(result.mask.sum()):>10,}{int(result.anomalies.sum()):>11,}"
+                  f"{ms:>10.1f}{ms / (values.size / 1e6):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare the old GitHub URL load with the local CSV and memory-mapped snapshot loads.
+
+    python benchmarks/bench_load.py --repeat 5
+    python benchmarks/bench_load.py --offline     # skip the URL load
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import data_store  # noqa: E402
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--release", default=data_store.RELEASE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--offline", action="store_true", help="do not time the GitHub URL load")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df, dt = data_store.load_csv(args.release)
+        data_store.write_snapshot(df, dt, args.release, tmp)
+
+        cases = {
+            "local csv": lambda: data_store.load_csv(args.release),
+            "snapshot (read)": lambda: data_store.load_snapshot(args.release, tmp, mmap=False),
+            "snapshot (mmap)": lambda: data_store.load_snapshot(args.release, tmp, mmap=True),
+        }
+        if not args.offline:
+            cases = {"github url": lambda: data_store.load_url(args.release), **cases}
+
+        print(f"{'source':<18}{'best ms':>12}{'mean ms':>12}")
+        for name, fn in cases.items():
+            try:
+                best, mean = best_of(fn, args.repeat)
+            except OSError as exc:
+                print(f"{name:<18}{'failed':>12}  ({exc})")
+                continue
+            print(f"{name:<18}{best * 1000:>12.2f}{mean * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Period totals for every country: slice-and-sum vs the cube's running sums.
+
+Summing the value matrix over a period touches countries x period months, so
+a five year comparison costs sixty times a single month. ``periods.totals``
+subtracts two columns of the running sums whatever the length. Both are
+timed per period length on a synthetic dataset.
+
+    python benchmarks/bench_periods.py --countries 10000 --months 600 --lengths 1 12 60 240
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dataset import from_frames  # noqa: E402
+from periods import Period, totals  # noqa: E402
+from synthetic import generate_frames  # noqa: E402
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=10000)
+    parser.add_argument("--months", type=int, default=600)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1, 3, 12, 60, 240])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    data = from_frames(*generate_frames(args.countries, args.months), strict=False)
+    stop = len(data.months)
+    print(f"{args.countries} countries x {args.months} months")
+    print(f"{'months':>8}{'slice sum us':>14}{'prefix us':>12}{'max diff':>12}")
+    for length in args.lengths:
+        period = Period(stop - length, stop, "")
+        naive = lambda: np.nan_to_num(data.country_values[:, period.start:period.stop]).sum(axis=1)  # noqa: E731
+        fast = lambda: totals(data, period)[0]  # noqa: E731
+        difference = np.abs(naive() - fast()).max()
+        print(f"{length:>8}{per_call(naive, args.repeat):>14.1f}{per_call(fast, args.repeat):>12.1f}{difference:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-month selection cost: melted long table scan vs month-major slice.
+
+The old app melted the wide frame at startup and every builder did
+``df_melted[df_melted['Month_Year'] == month]`` plus a ``.values`` membership
+test. The dataset now keeps the values month-major and selects a month with
+a slice. Both are timed on frames grown so that countries x months is
+``scale`` times the real data (each dimension grows by sqrt(scale)).
+
+    python benchmarks/bench_selection.py --scales 1 10 100
+"""
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dataset import from_frames  # noqa: E402
+from synthetic import generate_frames  # noqa: E402
+
+BASE_COUNTRIES = 33
+BASE_MONTHS = 75
+
+
+def old_startup(df):
+    melted = df.melt(id_vars="Region/Country", var_name="Month_Year", value_name="Value")
+    melted["Year"] = melted["Month_Year"].str.extract(r"_(\d{2,})$").astype(int) + 2000
+    melted["Month"] = melted["Month_Year"].str.extract(r"^([A-Za-z]{3})")
+    return melted
+
+
+def old_select(melted, month):
+    return melted[melted["Month_Year"] == month] if month in melted["Month_Year"].values else melted
+
+
+def per_call(fn, months, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for month in months:
+            fn(month)
+    return (time.perf_counter() - start) / (repeat * len(months)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--samples", type=int, default=20, help="months selected per measurement")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    header = f"{'scale':>6}{'countries':>11}{'months':>8}{'melt ms':>10}{'dataset ms':>12}" \
+             f"{'scan us':>10}{'slice us':>10}{'frame us':>10}"
+    print(header)
+    for scale in args.scales:
+        grow = math.sqrt(scale)
+        n_countries, n_months = round(BASE_COUNTRIES * grow), round(BASE_MONTHS * grow)
+        df, dt = generate_frames(n_countries, n_months)
+
+        start = time.perf_counter()
+        melted = old_startup(df)
+        melt_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        data = from_frames(df, dt, strict=False)
+        dataset_ms = (time.perf_counter() - start) * 1000
+
+        step = max(1, n_months // args.samples)
+        months = list(data.months[::step])
+        scan = per_call(lambda m: old_select(melted, m), months, args.repeat)
+        slice_ = per_call(data.month_rows, months, args.repeat)
+        frame = per_call(lambda m: data.long_frame(data.month_span(m)), months, args.repeat)
+        print(f"{scale:>6g}{n_countries:>11}{n_months:>8}{melt_ms:>10.1f}{dataset_ms:>12.1f}"
+              f"{scan:>10.1f}{slice_:>10.2f}{frame:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
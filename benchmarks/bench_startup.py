@@ -0,0 +1,137 @@
+"""Worker startup: import time per package and time to the first served requests.
+
+Import times come from ``python -X importtime -c "import app"``, summed per
+top-level package. The first-request timings start a fresh server process and
+measure, from process start, when it answers ``/``, ``/_dash-layout`` and the
+first panel callback; once with the lazy defaults and once with
+``app.preload()`` run before serving (what ``gunicorn --preload`` does in the
+master).
+
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --no-prerender   # first panel builds its figure
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+SERVE = """
+import logging, sys
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+import app
+if sys.argv[2] == "preload":
+    app.preload()
+app.server.run(port=int(sys.argv[1]), threaded=True)
+"""
+
+
+def import_times(module="app", env=None):
+    """(total ms, {top-level package: self ms}) for importing ``module`` in a fresh interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=SRC, env=env, capture_output=True, text=True, check=True)
+    packages = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+        if name.strip() == module:
+            total = int(cumulative_us) / 1000
+    return total, dict(packages)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def panel_request(month):
+    return {
+        "output": "..bar-chart.figure..",
+        "outputs": [{"id": "bar-chart", "property": "figure"}],
+        "inputs": [{"id": "month-dropdown", "property": "value", "value": month},
+                   {"id": "vintage-dropdown", "property": "value", "value": "latest"}],
+        "changedPropIds": ["month-dropdown.value"],
+        "state": [],
+    }
+
+
+def wait_for(url, deadline, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    while time.monotonic() < deadline:
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return
+        except urllib.error.HTTPError:
+            raise  # the server is up and failed the request
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.005)
+    raise TimeoutError(url)
+
+
+def first_requests(mode, month, env, timeout=60):
+    """Seconds from process start until the server answered /, the layout and one panel."""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.monotonic()
+    process = subprocess.Popen([sys.executable, "-c", SERVE, str(port), mode], cwd=SRC, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        wait_for(base + "/", deadline)
+        ready = time.monotonic() - start
+        wait_for(base + "/_dash-layout", deadline)
+        layout = time.monotonic() - start
+        wait_for(base + "/_dash-update-component", deadline, panel_request(month))
+        figure = time.monotonic() - start
+    finally:
+        process.terminate()
+        process.wait()
+    return ready, layout, figure
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--month", default="Jan_23")
+    parser.add_argument("--top", type=int, default=12, help="packages listed by import time")
+    parser.add_argument("--no-prerender", action="store_true", help="ignore pre-rendered payloads")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, REMITTANCE_RELOAD_INTERVAL="0")
+    if args.no_prerender:
+        env["REMITTANCE_PRERENDER_DIR"] = str(SRC / "no-prerendered-payloads")
+
+    runs = [import_times(env=env) for _ in range(args.repeat)]
+    print(f"import app: {statistics.median(total for total, _ in runs):.0f} ms (median of {args.repeat})")
+    packages = defaultdict(list)
+    for _, run in runs:
+        for name, ms in run.items():
+            packages[name].append(ms)
+    ranked = sorted(((statistics.median(ms), name) for name, ms in packages.items()), reverse=True)
+    for ms, name in ranked[:args.top]:
+        print(f"  {name:<32}{ms:>8.1f} ms")
+
+    print(f"\n{'mode':<10}{'listening':>12}{'layout':>10}{'1st panel':>12}   (s from process start, median)")
+    for mode in ("lazy", "preload"):
+        timings = [first_requests(mode, args.month, env) for _ in range(args.repeat)]
+        ready, layout, figure = (statistics.median(column) for column in zip(*timings))
+        print(f"{mode:<10}{ready:>12.2f}{layout:>10.2f}{figure:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
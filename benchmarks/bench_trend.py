@@ -0,0 +1,84 @@
+"""Trend chart cost as N grows: one Scatter per country vs packed WebGL lines.
+
+The old builder added a ``go.Scatter`` per country (after a full sort of
+every country's 12 month total); the browser pays per trace, so its drawing
+cost grew with N. ``create_trend_chart`` now picks the top N with a partial
+sort and packs them into at most ``trends.LINE_GROUPS`` Scattergl traces.
+For each N this prints the selection time, build + serialize time, the trace
+count and payload size of both, on a synthetic dataset with enough countries.
+
+    python benchmarks/bench_trend.py --countries 2000 --top 5 50 500 --window 12 24
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import app  # noqa: E402
+from dataset import from_frames  # noqa: E402
+from figure_cache import serialize  # noqa: E402
+from synthetic import generate_frames  # noqa: E402
+from trends import top_rows, window_sums  # noqa: E402
+
+
+def old_trend_chart(data, month, top_n, window):
+    # the per-country traces of the old builder, with its full sort
+    cube = data.cube
+    i = cube.position(month)
+    months = list(cube.months[i - window + 1: i + 1])
+    sums = np.nan_to_num(cube.country_values[:, i - window + 1: i + 1]).sum(axis=1)
+    fig = go.Figure()
+    for row in np.argsort(-sums, kind="stable")[:top_n]:
+        fig.add_trace(go.Scatter(x=months, y=cube.country_values[row, i - window + 1: i + 1],
+                                 mode="lines+markers", name=data.dimension.names[row]))
+    fig.update_layout(height=400)
+    fig.update_yaxes(type="log")
+    return fig
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=2000)
+    parser.add_argument("--months", type=int, default=120)
+    parser.add_argument("--top", type=int, nargs="+", default=[5, 20, 100, 500])
+    parser.add_argument("--window", type=int, nargs="+", default=[12])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    data = from_frames(*generate_frames(args.countries, args.months), strict=False)
+    month = data.latest_month()
+    i = data.cube.position(month)
+    app.figure_template()
+
+    print(f"{args.countries} countries x {args.months} months, ending {month}, best of {args.repeat}")
+    print(f"{'window':>7}{'N':>6}{'sort us':>10}{'part us':>10}"
+          f"{'old ms':>9}{'traces':>8}{'bytes':>10}{'new ms':>9}{'traces':>8}{'bytes':>10}")
+    for window in args.window:
+        sums = window_sums(data.cube, i, window)
+        for top_n in args.top:
+            sort_ms, _ = best_of(lambda: np.argsort(-sums, kind="stable")[:top_n], args.repeat)
+            part_ms, _ = best_of(lambda: top_rows(sums, top_n), args.repeat)
+            old_ms, old = best_of(lambda: serialize(old_trend_chart(data, month, top_n, window)), args.repeat)
+            new_ms, new = best_of(lambda: serialize(app.create_trend_chart(data, month, top_n, window)), args.repeat)
+            print(f"{window:>7}{top_n:>6}{sort_ms * 1000:>10.1f}{part_ms * 1000:>10.1f}"
+                  f"{old_ms:>9.1f}{len(json.loads(old)['data']):>8}{len(old):>10,}"
+                  f"{new_ms:>9.1f}{len(json.loads(new)['data']):>8}{len(new):>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Bytes on the wire per month, uncompressed vs gzip vs brotli.
+
+Replays the panel callback requests a browser sends when a month is picked
+(one ``/_dash-update-component`` POST per server-side panel, the KPI cards are
+drawn client-side) through the Flask test
+client with different ``Accept-Encoding`` headers and sums the response
+bodies. Also checks that a repeat request with ``If-None-Match`` gets a 304
+and reports the size of the cacheable ``/payload`` responses.
+
+    python benchmarks/bench_wire.py --months Jan_23 Feb_26
+"""
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import app  # noqa: E402
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def panel_requests(month, vintage=app.LATEST):
+    values = {"month-dropdown.value": month, "vintage-dropdown.value": vintage}
+    for output, spec in list(app.app.callback_map.items()):
+        if "callback" not in spec or not any(item["id"] == "month-dropdown" for item in spec["inputs"]):
+            continue  # only the server-side panel callbacks
+        inputs = [dict(item, value=values.get(f"{item['id']}.{item['property']}")) for item in spec["inputs"]]
+        outputs = [{"id": part.split(".")[0], "property": part.split(".")[1]}
+                   for part in output.strip(".").split("...")]
+        yield {
+            "output": output,
+            "outputs": outputs,  # panel callbacks always declare a list of outputs
+            "inputs": inputs,
+            "changedPropIds": ["month-dropdown.value"],
+            "state": [],
+        }
+
+
+def wire_bytes(client, month):
+    sizes = dict.fromkeys(ENCODINGS, 0)
+    not_modified = 0
+    for body in panel_requests(month):
+        for encoding in ENCODINGS:
+            response = client.post("/_dash-update-component", json=body, headers={"Accept-Encoding": encoding})
+            if response.status_code == 204:
+                break
+            sizes[encoding] += len(response.get_data())
+        etag = response.headers.get("ETag")
+        if etag:
+            again = client.post("/_dash-update-component", json=body,
+                                headers={"Accept-Encoding": "br", "If-None-Match": etag})
+            not_modified += again.status_code == 304
+    return sizes, not_modified
+
+
+def payload_bytes(client, month):
+    data = app.DATA.current()
+    sizes = dict.fromkeys(ENCODINGS, 0)
+    for panel in app.PANELS:
+        for encoding in ENCODINGS:
+            response = client.get(f"/payload/{data.version}/{month}/{panel}", headers={"Accept-Encoding": encoding})
+            if response.status_code == 200:
+                sizes[encoding] += len(response.get_data())
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--months", nargs="+", help="default: every month of the dataset")
+    args = parser.parse_args(argv)
+
+    client = app.server.test_client()
+    months = args.months or list(app.DATA.current().months)
+    print(f"{'month':<8}{'identity':>12}{'gzip':>10}{'br':>10}{'ratio':>8}{'304s':>6}{'payload br':>12}")
+    ratios = []
+    for month in months:
+        sizes, not_modified = wire_bytes(client, month)
+        ratio = sizes["identity"] / sizes["br"] if sizes["br"] else float("nan")
+        ratios.append(ratio)
+        print(f"{month:<8}{sizes['identity']:>12,}{sizes['gzip']:>10,}{sizes['br']:>10,}{ratio:>8.1f}"
+              f"{not_modified:>6}{payload_bytes(client, month)['br']:>12,}")
+    print(f"median compression ratio (identity / br): {statistics.median(ratios):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
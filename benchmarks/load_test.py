@@ -0,0 +1,253 @@
+"""Requests per second and latency percentiles of the panel callbacks over HTTP.
+
+A small asyncio driver, no dependencies: ``--connections`` keep-alive
+connections each post panel callback requests (random month, random
+server-side panel, built from the server's own ``/_dash-dependencies``) back
+to back for ``--duration`` seconds. Unless ``--cold``, every request is sent
+once beforehand so the figure cache is as warm as on a long running server.
+Run ``python src/prerender.py`` first, as the Render build does, or every
+gunicorn worker builds its own figures. Point it at a running server, or let
+it start the servers to compare:
+
+    python benchmarks/load_test.py --serve dev gunicorn
+    python benchmarks/load_test.py --serve gunicorn --workers 4 --threads 8
+    python benchmarks/load_test.py --url http://127.0.0.1:8050
+
+``dev`` is the Flask development server app.py runs (threaded, without the
+debug reloader); ``gunicorn`` is src/gunicorn.conf.py with wsgi.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+
+DEV_SERVER = """
+import logging, sys
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+import app
+app.start_dataset_watcher()
+app.app.run_server(debug=False, host="127.0.0.1", port=int(sys.argv[1]), threaded=True)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_json(url, body=None, timeout=30):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def start_server(kind, args):
+    port = free_port()
+    if kind == "dev":
+        command = [sys.executable, "-c", DEV_SERVER, str(port)]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", str(SRC / "gunicorn.conf.py"),
+                   "--bind", f"127.0.0.1:{port}", "--workers", str(args.workers),
+                   "--threads", str(args.threads), "wsgi:application"]
+    process = subprocess.Popen(command, cwd=SRC, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               env=dict(os.environ, REMITTANCE_RELOAD_INTERVAL="0"))
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            get_json(url + "/ready", timeout=5)
+            return process, url
+        except (urllib.error.URLError, ConnectionError):
+            if process.poll() is not None:
+                raise RuntimeError(f"{kind} server exited with {process.returncode}")
+            time.sleep(0.1)
+    process.terminate()
+    raise TimeoutError(f"{kind} server did not become ready")
+
+
+def callback_body(dependency, values):
+    # the body dash-renderer posts for one callback, ``values`` maps "id.property" to the input value
+    outputs = [{"id": part.split(".")[0], "property": part.split(".")[1]}
+               for part in dependency["output"].strip(".").split("...")]
+    return {
+        "output": dependency["output"],
+        "outputs": outputs if dependency["output"].startswith("..") else outputs[0],
+        "inputs": [dict(item, value=values.get(f"{item['id']}.{item['property']}")) for item in dependency["inputs"]],
+        "state": [dict(item, value=values.get(f"{item['id']}.{item['property']}")) for item in dependency["state"]],
+        "changedPropIds": [f"{item['id']}.{item['property']}" for item in dependency["inputs"]][:1],
+    }
+
+
+def workload(url):
+    """Request bodies for every (server-side panel, month) of the latest data."""
+    dependencies = get_json(url + "/_dash-dependencies")
+    server_side = [dep for dep in dependencies if not dep.get("clientside_function")]
+    refresh = next(dep for dep in server_side if "month-dropdown.options" in dep["output"])
+    options = get_json(url + "/_dash-update-component",
+                       callback_body(refresh, {"vintage-dropdown.value": "latest"}))
+    months = [option["value"] for option in options["response"]["month-dropdown"]["options"]]
+    panels = [dep for dep in server_side
+              if dep is not refresh and any(item["id"] == "month-dropdown" for item in dep["inputs"])]
+    return [json.dumps(callback_body(dep, {"month-dropdown.value": month, "vintage-dropdown.value": "latest"}))
+            .encode() for dep in panels for month in months]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    version, status = status_line.split()[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, value = line.decode("latin-1").split(":", 1)
+        headers[name.strip().lower()] = value.strip().lower()
+    status = int(status)
+    if status in (204, 304):
+        body = b""
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                break
+            body += chunk[:-2]
+    else:
+        body = await reader.read()
+        headers["connection"] = "close"
+    keep_alive = headers.get("connection") != "close" and version != b"HTTP/1.0"
+    return status, body, keep_alive
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def post(self, body):
+        """(status, seconds) of one callback request, reconnecting when the server closed the connection."""
+        request = (f"POST /_dash-update-component HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                   f"Content-Type: application/json\r\nAccept-Encoding: identity\r\n"
+                   f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+        for attempt in range(2):
+            reused = self.writer is not None
+            if not reused:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            start = time.monotonic()
+            try:
+                self.writer.write(request)
+                await self.writer.drain()
+                status, _, keep_alive = await read_response(self.reader)
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                status, keep_alive = "connection error", False
+                if not reused:
+                    break  # a fresh connection failed, an idle one the server timed out is retried
+        elapsed = time.monotonic() - start
+        if not keep_alive:
+            self.close()
+        return status, elapsed
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def prime(connection, queue, failing):
+    # every body once, so the measured run sees a warm figure cache like a long running server
+    while not queue.empty():
+        body = queue.get_nowait()
+        status, _ = await connection.post(body)
+        if status not in (200, 204):
+            failing.add(body)
+
+
+async def client(connection, bodies, stop_at, latencies, statuses, rng):
+    while time.monotonic() < stop_at:
+        status, elapsed = await connection.post(rng.choice(bodies))
+        latencies.append(elapsed)
+        statuses[status] += 1
+    connection.close()
+
+
+async def drive(url, bodies, connections, duration, warm, seed):
+    parts = urlsplit(url)
+    pool = [Connection(parts.hostname, parts.port or 80) for _ in range(connections)]
+    if warm:
+        queue, failing = asyncio.Queue(), set()
+        for body in bodies:
+            queue.put_nowait(body)
+        await asyncio.gather(*(prime(connection, queue, failing) for connection in pool))
+        if failing:
+            # months the builders cannot draw (the 2020/21 sunbursts) would be rebuilt and fail on every hit
+            print(f"  {len(failing)} of {len(bodies)} requests fail, left out of the measured run")
+            bodies = [body for body in bodies if body not in failing]
+    latencies, statuses = [], Counter()
+    stop_at = time.monotonic() + duration
+    rng = random.Random(seed)
+    await asyncio.gather(*(client(connection, bodies, stop_at, latencies, statuses, random.Random(rng.random()))
+                           for connection in pool))
+    return latencies, statuses
+
+
+def report(name, latencies, statuses, duration):
+    ordered = sorted(latencies)
+    quantile = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000  # noqa: E731
+    errors = {status: count for status, count in statuses.items() if status not in (200, 204)}
+    print(f"{name:<16}{len(ordered) / duration:>10.1f}{quantile(0.5):>10.1f}{quantile(0.95):>10.1f}"
+          f"{quantile(0.99):>10.1f}{ordered[-1] * 1000:>10.1f}{sum(errors.values()):>8}"
+          + (f"  {errors}" if errors else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8050", help="server to load when --serve is not given")
+    parser.add_argument("--serve", nargs="+", choices=("dev", "gunicorn"), help="start these servers one after the other")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds measured")
+    parser.add_argument("--cold", action="store_true", help="measure without requesting every panel and month once first")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{args.connections} connections, {args.duration:g} s, {'cold' if args.cold else 'warm'} caches")
+    print(f"{'server':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for kind in args.serve or [None]:
+        process, url = start_server(kind, args) if kind else (None, args.url)
+        try:
+            bodies = workload(url)
+            latencies, statuses = asyncio.run(drive(url, bodies, args.connections, args.duration,
+                                                    not args.cold, args.seed))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+        name = f"gunicorn {args.workers}x{args.threads}" if kind == "gunicorn" else kind or urlsplit(url).netloc
+        report(name, latencies, statuses, args.duration)
+
+
+if __name__ == "__main__":
+    main()
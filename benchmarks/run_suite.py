@@ -0,0 +1,163 @@
+"""Benchmark suite for the dashboard builders.
+
+Times startup preprocessing (building the dataset and aggregate cube), every
+``create_*`` builder and ``update_dashboard`` end to end on synthetic data of
+growing size, and records the peak traced memory of each step. Figure caches
+and the pre-render store are bypassed so every call does the full work.
+
+Results are written as JSON (one file per commit by default) so two runs can
+be compared:
+
+    python benchmarks/run_suite.py --sizes real medium
+    python benchmarks/run_suite.py --compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly  # noqa: E402
+
+import app  # noqa: E402
+from dataset import from_frames  # noqa: E402
+from figure_cache import FigureCache  # noqa: E402
+from forecast import compute, series_matrix  # noqa: E402
+from reloader import DatasetHolder  # noqa: E402
+from server_store import MemoryBackend, ServerStore  # noqa: E402
+from synthetic import generate_frames  # noqa: E402
+
+RESULTS_DIR = HERE / "results"
+
+# name -> (countries, months, regions)
+SIZES = {
+    "real": (33, 75, 6),
+    "medium": (1000, 240, 12),
+    "large": (10000, 600, 20),
+}
+
+
+def builder_calls(data, month):
+    return {
+        "create_total_indicator": lambda: app.create_total_indicator(data, month),
+        "create_change_indicator_month": lambda: app.create_change_indicator(data, month, "month"),
+        "create_change_indicator_year": lambda: app.create_change_indicator(data, month, "year"),
+        "create_top_changes_chart": lambda: app.create_top_changes_chart(data, month),
+        "create_trend_chart": lambda: app.create_trend_chart(data, month),
+        "create_choropleth_map": lambda: app.create_choropleth_map(data, month),
+        "create_bar_chart": lambda: app.create_bar_chart(data, month),
+        "create_sunburst_charts": lambda: app.create_sunburst_charts(data, month),
+        "create_period_chart": lambda: app.create_period_chart(data, month),
+        "create_forecast_chart": lambda: app.create_forecast_chart(data, month),  # fits every series, see live_app
+        "update_dashboard": lambda: app.update_dashboard(month),
+    }
+
+
+@contextmanager
+def live_app(data):
+    # point the app at the synthetic dataset with caching switched off,
+    # forecasts are fitted on every call instead of read from <FORECAST_DIR>/<version>.npz
+    saved = app.DATA, app.FIGURES, app.STORE, app.forecasts_for
+    app.DATA, app.FIGURES, app.STORE = DatasetHolder(data), FigureCache(maxsize=0), ServerStore(MemoryBackend(0))
+    app.forecasts_for = lambda data: compute(data.version, *series_matrix(data))
+    try:
+        yield
+    finally:
+        app.DATA, app.FIGURES, app.STORE, app.forecasts_for = saved
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_size(name, repeat):
+    countries, months, regions = SIZES[name]
+    df, dt = generate_frames(countries, months, regions)
+    results = {"startup": measure(lambda: from_frames(df, dt, strict=False), repeat)}
+
+    data = from_frames(df, dt, strict=False)
+    month = data.latest_month()
+    with live_app(data):
+        for builder, fn in builder_calls(data, month).items():
+            results[builder] = measure(fn, repeat)
+            print(f"  {name:<8}{builder:<32}{results[builder]['median_ms']:>10.1f} ms"
+                  f"{results[builder]['peak_kib']:>12.0f} KiB", flush=True)
+    return {"shape": {"countries": countries, "months": months, "regions": regions}, "results": results}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old_path, new_path):
+    old, new = (json.loads(Path(path).read_text()) for path in (old_path, new_path))
+    print(f"{'size':<8}{'step':<32}{'old ms':>10}{'new ms':>10}{'ratio':>8}")
+    for size, run in new["sizes"].items():
+        for step, stats in run["results"].items():
+            before = old["sizes"].get(size, {}).get("results", {}).get(step)
+            if before is None:
+                continue
+            ratio = stats["median_ms"] / before["median_ms"] if before["median_ms"] else float("nan")
+            print(f"{size:<8}{step:<32}{before['median_ms']:>10.1f}{stats['median_ms']:>10.1f}{ratio:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=sorted(SIZES), default=["real", "medium"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", type=Path, help="result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="print a comparison of two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "sizes": {name: run_size(name, args.repeat) for name in args.sizes},
+    }
+    out = args.out or RESULTS_DIR / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Fire thousands of parallel update_dashboard calls and check the output never changes.
+
+Every month is rendered once serially as the reference, then CALLS random
+months are rendered from a thread pool. The figure cache, the pre-rendered
+payloads and the server store are switched off, so every call runs the
+builders. The script exits non-zero if any call raised, if any threaded
+result differs from the reference or if the shared dataset was modified
+along the way.
+
+    python benchmarks/stress_concurrency.py --calls 2000 --threads 32
+"""
+import argparse
+import hashlib
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import plotly.io as pio  # noqa: E402
+
+import app  # noqa: E402
+from figure_cache import FigureCache  # noqa: E402
+from prerender import PayloadStore  # noqa: E402
+from server_store import MemoryBackend, ServerStore  # noqa: E402
+
+
+def fingerprint(month):
+    """(digest of the figures, None) or (None, "<month>: <exception>") when a builder raised."""
+    try:
+        figures = app.update_dashboard(month)
+    except Exception as exc:
+        return None, f"{month}: {type(exc).__name__}: {exc}"
+    digest = hashlib.sha1()
+    for fig in figures:
+        digest.update(pio.to_json(fig).encode())
+    return digest.hexdigest(), None
+
+
+def dataset_digest(data):
+    digest = hashlib.sha1()
+    for array in (data.country_values, data.region_values, data.cube.trailing, data.cube.country_delta):
+        digest.update(array.tobytes())
+    digest.update(repr(data.months).encode())
+    return digest.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # nothing cached, so the threads below build every figure concurrently instead of reading the cache
+    app.FIGURES, app.STORE = FigureCache(maxsize=0), ServerStore(MemoryBackend(0))
+    empty = tempfile.TemporaryDirectory()  # removed when main returns
+    app.PRERENDERED = PayloadStore(empty.name)
+    data = app.DATA.current()
+    before = dataset_digest(data)
+    reference = {month: fingerprint(month) for month in data.months}
+    errors = [error for _, error in reference.values() if error]
+
+    rng = random.Random(args.seed)
+    months = [rng.choice(data.months) for _ in range(args.calls)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(fingerprint, months))
+    elapsed = time.perf_counter() - start
+
+    errors += [error for _, error in results if error]
+    mismatches = [month for month, (result, error) in zip(months, results)
+                  if not error and result != reference[month][0]]
+    mutated = dataset_digest(data) != before
+
+    print(f"{args.calls} calls on {args.threads} threads in {elapsed:.1f}s "
+          f"({args.calls / elapsed:.1f} calls/s)")
+    print(f"errors: {len(errors)}  mismatches: {len(mismatches)}  dataset modified: {mutated}")
+    for error in sorted(set(errors)):
+        print(f"  {error}")
+    if errors or mismatches or mutated:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Synthetic wide frames shaped like feb26.csv / region_feb26.csv.
+
+The real data is 33 countries by ~75 months; this generates the same layout
+("Region/Country" label column followed by "Jan_20"... month columns) at any
+size so the builders can be timed well past it. Values follow a seasonal
+pattern with a trend and gamma noise per series, all strictly positive.
+
+    python benchmarks/synthetic.py --countries 10000 --months 600 --out /tmp/synthetic
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dataset import MONTH_NAMES  # noqa: E402
+
+LABEL_COLUMN = "Region/Country"
+MAX_MONTHS = 12 * 80  # two digit year labels from _20 up to _99
+
+
+def month_labels(n_months, start_year=20):
+    if n_months > MAX_MONTHS:
+        raise ValueError(f"at most {MAX_MONTHS} months fit the Mon_YY label format")
+    return [f"{MONTH_NAMES[i % 12]}_{start_year + i // 12:02d}" for i in range(n_months)]
+
+
+def _series(rng, n_rows, n_months, scale):
+    level = rng.lognormal(np.log(scale), 1.5, size=(n_rows, 1))
+    trend = 1 + rng.normal(0.004, 0.003, size=(n_rows, 1)) * np.arange(n_months)
+    season = 1 + 0.1 * np.sin(2 * np.pi * (np.arange(n_months) + rng.integers(0, 12, size=(n_rows, 1))) / 12)
+    noise = rng.gamma(20.0, 1 / 20.0, size=(n_rows, n_months))
+    return level * np.clip(trend, 0.1, None) * season * noise
+
+
+def generate_frames(countries=33, months=75, regions=6, seed=0):
+    """Return (df, dt): countries x months and regions x months, labels indented like the CBK sheets."""
+    rng = np.random.default_rng(seed)
+    labels = month_labels(months)
+
+    country_values = _series(rng, countries, months, scale=2000.0)
+    df = pd.DataFrame(country_values, columns=labels)
+    df.insert(0, LABEL_COLUMN, [f"     Country {i:05d}" for i in range(countries)])
+
+    # every country belongs to one region, region rows are the sums like "Total America"
+    membership = rng.integers(0, regions, size=countries)
+    region_values = np.zeros((regions, months))
+    np.add.at(region_values, membership, country_values)
+    dt = pd.DataFrame(region_values, columns=labels)
+    dt.insert(0, LABEL_COLUMN, [f"    Region {i:03d}" for i in range(regions)])
+    return df, dt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=33)
+    parser.add_argument("--months", type=int, default=75)
+    parser.add_argument("--regions", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--release", default="synthetic")
+    parser.add_argument("--out", type=Path, required=True, help="directory for <release>.csv and region_<release>.csv")
+    args = parser.parse_args(argv)
+
+    df, dt = generate_frames(args.countries, args.months, args.regions, args.seed)
+    args.out.mkdir(parents=True, exist_ok=True)
+    df.to_csv(args.out / f"{args.release}.csv", index=False)
+    dt.to_csv(args.out / f"region_{args.release}.csv", index=False)
+    print(f"wrote {args.countries} countries x {args.months} months to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Per-month aggregate cube.
+
+Everything the dashboard callbacks used to recompute on each dropdown change
+(region totals, month-over-month and year-over-year deltas, per-country
+changes, top-N orderings, trailing 12 month sums) is computed once when the
+data loads. Every array is indexed by month position so a callback only has
+to look up ``cube.index[month]`` and slice. Running sums over the months make
+the total of any contiguous run of months, for every country at once, one
+subtraction (``range_sums``, used by periods.py).
+"""
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+
+TRAILING_WINDOW = 12
+
+
+@dataclass(frozen=True)
+class AggregateCube:
+    months: tuple
+    index: MappingProxyType     # month label -> position
+    countries: tuple
+
+    region_totals: np.ndarray   # (months,) sum over the region frame
+    mom_delta: np.ndarray       # (months,) NaN for the first month
+    mom_pct: np.ndarray
+    yoy_position: np.ndarray    # (months,) position of the same month last year, -1 if missing
+    yoy_delta: np.ndarray
+    yoy_pct: np.ndarray
+
+    country_values: np.ndarray  # (countries, months)
+    country_delta: np.ndarray   # (countries, months) change from the previous month
+    increase_order: np.ndarray  # (months, countries) descending by country_delta
+    decrease_order: np.ndarray  # (months, countries) ascending by country_delta
+    value_order: np.ndarray     # (months, countries) descending by country_values
+    trailing: np.ndarray        # (countries, months) trailing window sums, NaN until the window is full
+    trailing_order: np.ndarray  # (months, countries) descending by trailing
+    country_prefix: np.ndarray  # (countries, months + 1) running sums, column j sums months < j, NaN as 0
+    region_prefix: np.ndarray   # (months + 1,) running sums of region_totals
+
+    window: int = TRAILING_WINDOW
+
+    def position(self, month):
+        return self.index[month]
+
+    def previous_month(self, month):
+        i = self.index[month]
+        return self.months[i - 1] if i > 0 else None
+
+    def previous_year(self, month):
+        j = self.yoy_position[self.index[month]]
+        return self.months[j] if j >= 0 else None
+
+    def window_months(self, month):
+        i = self.index[month]
+        if i < self.window - 1:
+            return None
+        return self.months[i - self.window + 1: i + 1]
+
+    def range_sums(self, start, stop):
+        """(per-country sums, region total) of the months at positions ``start`` up to ``stop``."""
+        return (self.country_prefix[:, stop] - self.country_prefix[:, start],
+                self.region_prefix[stop] - self.region_prefix[start])
+
+
+def freeze(array):
+    array = np.ascontiguousarray(array)
+    array.flags.writeable = False
+    return array
+
+
+def _pct(delta, base):
+    # mirrors the old "(difference / previous_total * 100) if previous_total else 0"
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(base != 0, delta / base * 100, 0.0)
+    return np.where(np.isnan(delta), np.nan, pct)
+
+
+def _descending(matrix):
+    # stable descending order per month, NaN sorts last like pandas sort_values
+    return np.argsort(-matrix.T, axis=1, kind="stable")
+
+
+def yoy_positions(months):
+    index = {month: i for i, month in enumerate(months)}
+    positions = np.full(len(months), -1, dtype=np.int64)
+    for i, month in enumerate(months):
+        name, year = month.split("_")
+        positions[i] = index.get(f"{name}_{int(year) - 1:02d}", -1)
+    return positions
+
+
+def prefix_sums(values):
+    # running sums along the last axis with a leading zero, so a range is prefix[stop] - prefix[start]
+    shape = values.shape[:-1] + (1,)
+    return np.concatenate([np.zeros(shape), np.cumsum(np.nan_to_num(values), axis=-1)], axis=-1)
+
+
+def trailing_sums(values, window=TRAILING_WINDOW, prefix=None):
+    # cumulative sum trick: one pass for every month and country at once
+    n_rows, n_months = values.shape
+    out = np.full((n_rows, n_months), np.nan)
+    if n_months >= window:
+        csum = prefix_sums(values) if prefix is None else prefix
+        out[:, window - 1:] = csum[:, window:] - csum[:, :-window]
+    return out
+
+
+def build_cube(months, countries, country_values, region_values, window=TRAILING_WINDOW):
+    """Compute every aggregate from the (countries, months) and (regions, months) matrices."""
+    months = tuple(months)
+    index = MappingProxyType({month: i for i, month in enumerate(months)})
+
+    region_totals = np.nansum(region_values, axis=0)
+    mom_delta = np.full(len(months), np.nan)
+    mom_delta[1:] = np.diff(region_totals)
+    mom_pct = _pct(mom_delta, np.concatenate([[np.nan], region_totals[:-1]]))
+
+    yoy_position = yoy_positions(months)
+    has_yoy = yoy_position >= 0
+    yoy_base = np.where(has_yoy, region_totals[yoy_position], np.nan)
+    yoy_delta = np.where(has_yoy, region_totals - yoy_base, np.nan)
+    yoy_pct = _pct(yoy_delta, yoy_base)
+
+    country_delta = np.full_like(country_values, np.nan)
+    country_delta[:, 1:] = np.diff(country_values, axis=1)
+    country_prefix = prefix_sums(country_values)
+    trailing = trailing_sums(country_values, window, country_prefix)
+
+    return AggregateCube(
+        months=months,
+        index=index,
+        countries=tuple(countries),
+        region_totals=freeze(region_totals),
+        mom_delta=freeze(mom_delta),
+        mom_pct=freeze(mom_pct),
+        yoy_position=freeze(yoy_position),
+        yoy_delta=freeze(yoy_delta),
+        yoy_pct=freeze(yoy_pct),
+        country_values=freeze(country_values),
+        country_delta=freeze(country_delta),
+        increase_order=freeze(_descending(country_delta)),
+        decrease_order=freeze(np.argsort(country_delta.T, axis=1, kind="stable")),
+        value_order=freeze(_descending(country_values)),
+        trailing=freeze(trailing),
+        trailing_order=freeze(_descending(trailing)),
+        country_prefix=freeze(country_prefix),
+        region_prefix=freeze(prefix_sums(region_totals)),
+        window=window,
+    )
+
+
+def _grow(array, n_months, axis):
+    # copy of a frozen array with room for appended months along ``axis`` (new cells are NaN)
+    if array.shape[axis] == n_months:
+        return np.array(array)
+    shape = list(array.shape)
+    shape[axis] = n_months
+    grown = np.full(shape, np.nan if array.dtype.kind == "f" else -1, dtype=array.dtype)
+    index = [slice(None)] * array.ndim
+    index[axis] = slice(0, array.shape[axis])
+    grown[tuple(index)] = array
+    return grown
+
+
+def affected_positions(cube, months, changed):
+    """Month positions whose aggregates depend on any of the ``changed`` positions."""
+    n = len(months)
+    changed = sorted(set(changed) | set(range(len(cube.months), n)))
+    yoy = yoy_positions(months)
+    mom = {p for c in changed for p in (c, c + 1) if p < n}
+    year = set(changed) | set(np.flatnonzero(np.isin(yoy, changed)).tolist())
+    window = {p for c in changed for p in range(c, min(n, c + cube.window))}
+    return {"changed": changed, "mom": sorted(mom), "yoy": sorted(year), "trailing": sorted(window)}
+
+
+def update_cube(cube, months, countries, country_values, region_values, changed):
+    """Return a new cube with only the aggregates touching ``changed`` recomputed.
+
+    ``months`` must extend ``cube.months`` (new months are appended at the end
+    and count as changed); ``changed`` are the positions of revised months. Work
+    is proportional to the number of affected months, not to the history.
+    """
+    months = tuple(months)
+    n = len(months)
+    if months[:len(cube.months)] != cube.months or tuple(countries) != cube.countries:
+        raise ValueError("incremental update needs the same countries and months appended at the end")
+    touched = affected_positions(cube, months, changed)
+    changed, mom, year, window = touched["changed"], touched["mom"], touched["yoy"], touched["trailing"]
+
+    region_totals = _grow(cube.region_totals, n, 0)
+    region_totals[changed] = np.nansum(region_values[:, changed], axis=0)
+
+    mom_delta, mom_pct = _grow(cube.mom_delta, n, 0), _grow(cube.mom_pct, n, 0)
+    country_delta = _grow(cube.country_delta, n, 1)
+    for p in mom:
+        if p > 0:
+            mom_delta[p] = region_totals[p] - region_totals[p - 1]
+            mom_pct[p] = _pct(mom_delta[p:p + 1], region_totals[p - 1:p])[0]
+            country_delta[:, p] = country_values[:, p] - country_values[:, p - 1]
+
+    yoy_position = yoy_positions(months)
+    yoy_delta, yoy_pct = _grow(cube.yoy_delta, n, 0), _grow(cube.yoy_pct, n, 0)
+    for p in year:
+        j = yoy_position[p]
+        if j >= 0:
+            yoy_delta[p] = region_totals[p] - region_totals[j]
+            yoy_pct[p] = _pct(yoy_delta[p:p + 1], region_totals[j:j + 1])[0]
+
+    trailing = _grow(cube.trailing, n, 1)
+    filled = np.nan_to_num(country_values)
+    for p in window:
+        if p >= cube.window - 1:
+            trailing[:, p] = filled[:, p - cube.window + 1:p + 1].sum(axis=1)
+
+    # running sums only change from the first changed month on
+    first = changed[0] if changed else n
+    country_prefix = _grow(cube.country_prefix, n + 1, 1)
+    country_prefix[:, first + 1:] = country_prefix[:, [first]] + np.cumsum(filled[:, first:], axis=1)
+    region_prefix = _grow(cube.region_prefix, n + 1, 0)
+    region_prefix[first + 1:] = region_prefix[first] + np.cumsum(np.nan_to_num(region_totals[first:]))
+
+    increase_order = _grow(cube.increase_order, n, 0)
+    decrease_order = _grow(cube.decrease_order, n, 0)
+    value_order = _grow(cube.value_order, n, 0)
+    trailing_order = _grow(cube.trailing_order, n, 0)
+    if mom:
+        increase_order[mom] = _descending(country_delta[:, mom])
+        decrease_order[mom] = np.argsort(country_delta[:, mom].T, axis=1, kind="stable")
+    value_order[changed] = _descending(country_values[:, changed])
+    if window:
+        trailing_order[window] = _descending(trailing[:, window])
+
+    return AggregateCube(
+        months=months,
+        index=MappingProxyType({month: i for i, month in enumerate(months)}),
+        countries=cube.countries,
+        region_totals=freeze(region_totals),
+        mom_delta=freeze(mom_delta),
+        mom_pct=freeze(mom_pct),
+        yoy_position=freeze(yoy_position),
+        yoy_delta=freeze(yoy_delta),
+        yoy_pct=freeze(yoy_pct),
+        country_values=freeze(country_values),
+        country_delta=freeze(country_delta),
+        increase_order=freeze(increase_order),
+        decrease_order=freeze(decrease_order),
+        value_order=freeze(value_order),
+        trailing=freeze(trailing),
+        trailing_order=freeze(trailing_order),
+        country_prefix=freeze(country_prefix),
+        region_prefix=freeze(region_prefix),
+        window=cube.window,
+    )
@@ -1,21 +1,45 @@
-import pandas as pd
-import plotly.express as px
+import json
+import os
+from functools import lru_cache, wraps
+import numpy as np
 import plotly.graph_objects as go
-from dash import Dash, dcc, html, Input, Output
-import dash_bootstrap_components as dbc
-from dash_bootstrap_templates import load_figure_template
-
-# for local host
-#df=pd.read_csv(r"C:\Users\KMC\Desktop\ds\remitances\Kenya-remittance-dashboard\data\processed\apr25.csv")
-#dt=pd.read_csv(r"C:\Users\KMC\Desktop\ds\remitances\Kenya-remittance-dashboard\data\processed\region_apr25.csv")
-# for github 
-df=pd.read_csv("https://raw.githubusercontent.com/samy-migwi/Kenya-remittance-dashboard/main/data/processed/feb26.csv")
-dt=pd.read_csv("https://raw.githubusercontent.com/samy-migwi/Kenya-remittance-dashboard/main/data/processed/region_feb26.csv")
-
-# Data preprocessing
-df_melted = df.melt(id_vars="Region/Country", var_name="Month_Year", value_name="Value")
-df_melted['Year'] = df_melted['Month_Year'].str.extract(r'_(\d{2})$').astype(int) + 2000
-df_melted['Month'] = df_melted['Month_Year'].str.extract(r'^([A-Za-z]{3})')
+from dash import ClientsideFunction, Dash, dcc, html, Input, Output, State, no_update
+from dash.exceptions import PreventUpdate
+from flask import Flask, jsonify
+
+from dataset import from_frames, load_dataset
+from reloader import DatasetHolder, RELOAD_INTERVAL, start_watcher
+from figure_cache import FigureCache, serialize
+from prerender import PayloadStore
+from timing import timed, install as install_timing
+from http_cache import install as install_http_cache
+from vintages import load_vintages
+from server_store import SHARED, ServerStore, make_handle
+from forecast import HORIZON, HORIZON_CHOICES, TOTAL, forecasts_for, future_months, series_values
+from imputation import notes as imputation_notes
+from periods import DEFAULT_PERIOD, PERIODS, comparison, resolve, table, totals
+from trends import (LINE_GROUPS, TOP_N_CHOICES, TREND_TOP_N, TREND_WINDOW, WINDOW_CHOICES,
+                    packed_lines, top_rows, window_sums)
+
+# local snapshot (or data/processed csv) instead of fetching from github on every worker boot
+# REMITTANCE_DATA_DIR / REMITTANCE_RELEASE / REMITTANCE_SNAPSHOT_DIR pick the files, see data_store.py
+# the dataset is read-only (frozen arrays + precomputed aggregates) so every thread can share it;
+# DATA is a versioned pointer that the snapshot watcher swaps when new data lands on disk;
+# it is loaded by the first request, or up front by preload() (gunicorn --preload)
+DATA = DatasetHolder(load=load_dataset)
+# the snapshot watcher is a thread, so it is started per serving process (threads do not survive a fork):
+# by __main__ below or by gunicorn's post_worker_init hook (gunicorn.conf.py), see start_dataset_watcher()
+WATCHER = None
+# every published CBK release for the vintage toggle, None until batch_import.py / vintages.py built it
+VINTAGES = load_vintages()
+LATEST = "latest"
+# serialized figures keyed by (builder, month, dataset version), size from REMITTANCE_FIGURE_CACHE_SIZE;
+# one version per vintage so switching between them does not throw the cache away
+FIGURES = FigureCache(versions=1 + (len(VINTAGES.releases) if VINTAGES else 0))
+# per-panel figure json written at deploy time by src/prerender.py
+PRERENDERED = PayloadStore()
+# derived frames behind small handles, shared between workers when REMITTANCE_SERVER_STORE is disk/redis
+STORE = ServerStore.from_env()
 
 # Kenya theme colors
 KENYA_THEME = {
@@ -27,11 +51,48 @@ KENYA_THEME = {
 }
 
 # Initialize the Dash
-app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-server = app.server
+# callback responses and assets are compressed (brotli, else gzip), the configuration is read when Dash sets up flask-compress
+server = Flask(__name__)
+server.config.update(COMPRESS_ALGORITHM=["br", "gzip"], COMPRESS_BR_LEVEL=5, COMPRESS_LEVEL=6)
+# dbc.themes.BOOTSTRAP, as the plain URL so dash_bootstrap_components loads with the layout
+BOOTSTRAP_CSS = "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css"
+app = Dash(__name__, server=server, external_stylesheets=[BOOTSTRAP_CSS], compress=True)
+
+@server.route("/cache-stats")
+def cache_stats():
+    return jsonify(dict(FIGURES.stats(), server_store=STORE.stats()))
+
+@server.route("/ready")
+def ready():
+    # readiness probe: loads the dataset if preload() did not, 503 while it cannot be loaded
+    preloaded = DATA.loaded
+    try:
+        data = DATA.current()
+    except Exception as exc:
+        return jsonify(ready=False, error=f"{type(exc).__name__}: {exc}"), 503
+    return jsonify(ready=True, version=data.version, months=len(data.months), latest=data.latest_month(),
+                   preloaded=preloaded, watcher=WATCHER is not None, pid=os.getpid())
+
+# per-panel phase timings on /panel-timings, /metrics (Prometheus) and in the Server-Timing header;
+# REMITTANCE_PROFILING=1 plus an "X-Profile: 1" request header dumps a cProfile of that request
+install_timing(server)
 
 # Load Bootstrap
-load_figure_template("bootstrap")
+# validating the template imports a validator module per trace type, about as slow as
+# importing dash itself, and only a figure build needs it (pre-rendered payloads do not)
+@lru_cache(maxsize=None)
+def figure_template():
+    from dash_bootstrap_templates import load_figure_template
+
+    load_figure_template("bootstrap")
+
+def themed(build):
+    # figures pick up the default template when they are created
+    @wraps(build)
+    def themed_build(*args, **kwargs):
+        figure_template()
+        return build(*args, **kwargs)
+    return themed_build
 
 # Custom CSS
 CUSTOM_STYLES = {
@@ -61,8 +122,10 @@ CUSTOM_STYLES = {
     }
 }
 
-def create_total_indicator(current_month="Jan_23"):
-    current_total = dt[current_month].sum()
+@themed
+def create_total_indicator(data, current_month="Jan_23"):
+    cube = data.cube
+    current_total = cube.region_totals[cube.position(current_month)]
     
     fig = go.Figure()
     fig.add_trace(go.Indicator(
@@ -90,34 +153,32 @@ def create_total_indicator(current_month="Jan_23"):
     
     return fig
 
-def create_change_indicator(current_month="Jan_23", comparison_type="month"):
-    month_columns = [col for col in dt.columns if col != 'Region/Country']
+@themed
+def create_change_indicator(data, current_month="Jan_23", comparison_type="month"):
+    cube = data.cube
+    i = cube.position(current_month)
+    current_total = cube.region_totals[i]
     
     if comparison_type == "month":
-        current_index = month_columns.index(current_month)
-        previous_month = month_columns[current_index - 1] if current_index > 0 else None
+        previous_month = cube.previous_month(current_month)
         if not previous_month:
             return go.Figure()
         
-        current_total = dt[current_month].sum()
-        previous_total = dt[previous_month].sum()
-        difference = current_total - previous_total
-        pct_change = (difference / previous_total * 100) if previous_total else 0
+        previous_total = cube.region_totals[i - 1]
+        difference = cube.mom_delta[i]
+        pct_change = cube.mom_pct[i]
         title = f"MONTHLY CHANGE FROM {previous_month.replace('_', ' ').upper()}"
         current_label = f"{current_month.replace('_', ' ').upper()} TOTAL"
         previous_label = f"{previous_month.replace('_', ' ').upper()} TOTAL"
         
     else:  # year-over-year
-        month_name, year_suffix = current_month.split("_")
-        previous_year = f"{month_name}_{int(year_suffix) - 1:02d}"
-        
-        if previous_year not in month_columns:
+        previous_year = cube.previous_year(current_month)
+        if not previous_year:
             return go.Figure()
         
-        current_total = dt[current_month].sum()
-        previous_total = dt[previous_year].sum()
-        difference = current_total - previous_total
-        pct_change = (difference / previous_total * 100) if previous_total else 0
+        previous_total = cube.region_totals[cube.yoy_position[i]]
+        difference = cube.yoy_delta[i]
+        pct_change = cube.yoy_pct[i]
         title = f"YEARLY CHANGE FROM {previous_year.replace('_', ' ').upper()}"
         current_label = f"{current_month.replace('_', ' ').upper()} TOTAL"
         previous_label = f"{previous_year.replace('_', ' ').upper()} TOTAL"
@@ -201,27 +262,27 @@ def create_change_indicator(current_month="Jan_23", comparison_type="month"):
     
     return fig
 
-def create_top_changes_chart(current_month="Feb_23"):
-    month_columns = [col for col in df.columns if col != 'Region/Country']
-    current_index = month_columns.index(current_month)
-    previous_month = month_columns[current_index - 1] if current_index > 0 else None
+@themed
+def create_top_changes_chart(data, current_month="Feb_23"):
+    cube = data.cube
+    previous_month = cube.previous_month(current_month)
     
     if not previous_month:
         return go.Figure()
     
-    df['Difference'] = df[current_month] - df[previous_month]
-    df_sorted = df[['Region/Country', 'Difference']].copy()
-    top_increase = df_sorted.sort_values(by='Difference', ascending=False).head(5)
-    top_decrease = df_sorted.sort_values(by='Difference', ascending=True).head(5)
-    combined = pd.concat([top_increase, top_decrease]).sort_values(by='Difference')
+    i = cube.position(current_month)
+    rows = np.concatenate([cube.increase_order[i, :5], cube.decrease_order[i, :5]])
+    difference = cube.country_delta[rows, i]
+    order = np.argsort(difference, kind="stable")
+    rows, difference = rows[order], difference[order]
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        y=combined['Region/Country'],
-        x=combined['Difference'],
+        y=[cube.countries[r] for r in rows],
+        x=difference,
         orientation='h',
-        marker_color=combined['Difference'].apply(lambda x: KENYA_THEME["primary"] if x >= 0 else KENYA_THEME["secondary"]),
-        text=combined['Difference'].apply(lambda x: f"${x:,.0f}"),
+        marker_color=[KENYA_THEME["primary"] if x >= 0 else KENYA_THEME["secondary"] for x in difference],
+        text=[f"${x:,.0f}" for x in difference],
         textposition='auto',
         hovertemplate='%{y}: %{text}<extra></extra>',
     ))
@@ -239,47 +300,50 @@ def create_top_changes_chart(current_month="Feb_23"):
     
     return fig
 
-def create_trend_chart(current_month="Feb_23"):
-    non_month_cols = ["Region/Country"]
-    month_cols = [col for col in df.columns if col not in non_month_cols]
-    
-    current_index = month_cols.index(current_month)
-    if current_index < 11:
+@themed
+def create_trend_chart(data, current_month="Feb_23", top_n=TREND_TOP_N, window=TREND_WINDOW):
+    cube = data.cube
+    i = cube.position(current_month)
+    window = int(window)
+    if not 1 <= window <= i + 1:
         return go.Figure()
     
-    last_12_months = month_cols[current_index - 11 : current_index + 1]
-    df["Total_12_Months"] = df[last_12_months].sum(axis=1)
-    top_5 = df.sort_values("Total_12_Months", ascending=False).head(5)
+    months = cube.months[i - window + 1: i + 1]
+    values = cube.country_values[:, i - window + 1: i + 1]
+    top = top_rows(window_sums(cube, i, window), top_n)
+    names = data.dimension.names
     
     fig = go.Figure()
     
-    # Add U.S.A. line if exists
-    usa_rows = df[df["Region/Country"] == "U.S.A"]
-    if not usa_rows.empty:
-        usa_data = usa_rows.iloc[0]
-        fig.add_trace(go.Scatter(
-            x=last_12_months,
-            y=usa_data[last_12_months],
+    # Add U.S.A. line if exists (matched on its ISO-3 code, the label is "     U.S.A")
+    highlight = data.dimension.iso3.index("USA") if "USA" in data.dimension.iso3 else None
+    if highlight is not None:
+        fig.add_trace(go.Scattergl(
+            x=months,
+            y=values[highlight],
             mode="lines+markers",
-            name="U.S.A",
+            name=names[highlight],
             line=dict(dash="dash", color=KENYA_THEME["dark"], width=3),
             marker=dict(symbol="circle", size=6)
         ))
     
-    #  top 5 countries (skip U.S.A already plotted since it making my diagram not to be infomative)
-    for _, row in top_5.iterrows():
-        country = row["Region/Country"]
-        if country == "U.S.A":
-            continue
-        fig.add_trace(go.Scatter(
-            x=last_12_months,
-            y=row[last_12_months],
+    #  top N countries (skip U.S.A already plotted since it making my diagram not to be infomative)
+    # packed into at most LINE_GROUPS traces whatever N is, see trends.py
+    if highlight is not None:
+        top = top[top != highlight]
+    for x, y, text, members in packed_lines(values[top], months, [names[r] for r in top]):
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
+            text=text,
             mode="lines+markers",
-            name=country
+            name=text[0] if len(members) == 1 else f"{len(members)} countries",
+            showlegend=len(top) <= LINE_GROUPS,  # past that a trace holds several countries, the hover names them
+            hovertemplate="<b>%{text}</b><br>%{x}: %{y:,.0f}<extra></extra>",
         ))
     
     fig.update_layout(
-        title=f"12-Month Trend (Ending {current_month.replace('_', ' ')})",
+        title=f"{window}-Month Trend (Ending {current_month.replace('_', ' ')})",
         xaxis_title="Month",
         yaxis_title="Remittance Amount (Log Scale)",
         legend_title="Region/Country",
@@ -288,24 +352,34 @@ def create_trend_chart(current_month="Feb_23"):
         paper_bgcolor=KENYA_THEME["light"],
         margin=dict(l=40, r=40, t=80, b=40)
     )
+    fig.update_xaxes(type="category")
     fig.update_yaxes(type="log")
     
     return fig
 
-def create_choropleth_map(current_month="Jan_23"):
-    filtered_data = df_melted[df_melted['Month_Year'] == current_month] if current_month in df_melted['Month_Year'].values else df_melted
+# only the countries in the data, a static asset the browser fetches once instead of a copy in every figure
+COUNTRY_SHAPES = app.get_asset_url("geo/countries.geo.json")
+
+@themed
+def create_choropleth_map(data, current_month="Jan_23"):
+    import plotly.express as px  # slow import, only needed when a figure is not cached
+
+    filtered_data = data.long_frame(data.month_span(current_month))
+    # ISO-3 ids resolved at load time (countries.py) instead of name matching in the browser
+    filtered_data["ISO-3"] = data.dimension.iso3
     
     choropleth_fig = px.choropleth(
         filtered_data,
-        locations="Region/Country",
-        locationmode="country names",
-        color="Value",
-        hover_data=["Value"],
+        geojson=COUNTRY_SHAPES,
+        locations="ISO-3",
+        color="Value",  # the hover already shows it as z, no hover_data copy
         title=f"Remittance Sources ({current_month.replace('_', ' ')})",
         color_continuous_scale="Viridis",
         range_color=(0, filtered_data["Value"].quantile(0.95)),
         height=400
     )
+    # the display name comes with the shape, it is not repeated in every figure
+    choropleth_fig.update_traces(hovertemplate="<b>%{properties.name}</b><br>Value=%{z}<extra></extra>")
     choropleth_fig.update_layout(
         paper_bgcolor=KENYA_THEME["light"],
         plot_bgcolor=KENYA_THEME["light"]
@@ -313,15 +387,20 @@ def create_choropleth_map(current_month="Jan_23"):
     
     return choropleth_fig
 
-def create_bar_chart(current_month="Jan_23"):
-    filtered_data = df_melted[df_melted['Month_Year'] == current_month] if current_month in df_melted['Month_Year'].values else df_melted
-    bar_data = filtered_data.groupby("Region/Country")['Value'].sum().sort_values(ascending=False).head(10)
+@themed
+def create_bar_chart(data, current_month="Jan_23"):
+    import plotly.express as px  # slow import, only needed when a figure is not cached
+
+    cube = data.cube
+    i = cube.position(current_month)
+    top_10 = cube.value_order[i, :10]
+    bar_values = cube.country_values[top_10, i]
     
     bar_fig = px.bar(
-        x=bar_data.values,
-        y=bar_data.index,
+        x=bar_values,
+        y=[cube.countries[r] for r in top_10],
         orientation='h',
-        color=bar_data.values,
+        color=bar_values,
         color_continuous_scale=[KENYA_THEME["secondary"], KENYA_THEME["primary"]],
         title=f"Top 10 Countries by Remittance ({current_month.replace('_', ' ')})",
         labels={"x": "Remittance (USD)", "y": "Country"},
@@ -334,15 +413,180 @@ def create_bar_chart(current_month="Jan_23"):
     
     return bar_fig
 
-def create_sunburst_charts(current_month="Jan_23"):
+@themed
+def create_period_chart(data, current_month="Jan_23", kind=DEFAULT_PERIOD, first=None, last=None):
+    # any period is two reads of the running sums, a multi-year range costs what a month does (periods.py)
+    period = resolve(data, kind, current_month, first, last)
+    values, total = totals(data, period)
+    previous = comparison(data, kind, period)
+    top_10 = top_rows(values, 10)
+    names = [data.dimension.names[r] for r in top_10]
+    
+    fig = go.Figure()
+    title = f"{PERIODS[kind].title()}: {period.label} (${total:,.0f})"
+    if previous is not None:
+        previous_values, previous_total = totals(data, previous)
+        change = (total - previous_total) / previous_total * 100 if previous_total else 0
+        title += f"<br><sup>{'▲' if change >= 0 else '▼'} {abs(change):.1f}% from {previous.label}</sup>"
+        fig.add_trace(go.Bar(
+            y=names,
+            x=previous_values[top_10],
+            orientation='h',
+            name=previous.label,
+            marker_color=KENYA_THEME["secondary"],
+            hovertemplate='%{y}: $%{x:,.0f}<extra>' + previous.label + '</extra>',
+        ))
+    fig.add_trace(go.Bar(
+        y=names,
+        x=values[top_10],
+        orientation='h',
+        name=period.label,
+        marker_color=KENYA_THEME["primary"],
+        hovertemplate='%{y}: $%{x:,.0f}<extra>' + period.label + '</extra>',
+    ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title="Remittance (USD)",
+        yaxis=dict(title="Country", autorange="reversed"),
+        barmode="group",
+        plot_bgcolor=KENYA_THEME["light"],
+        paper_bgcolor=KENYA_THEME["light"],
+        height=400,
+        margin=dict(l=40, r=40, t=80, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=1.0, xanchor="right", x=1),
+    )
+    
+    return fig
+
+def forecasts(data):
+    # every series forecast in one batched pass per dataset version, stored next to the snapshot (forecast.py)
+    return STORE.get_or_compute(data.version, SHARED, "forecasts", lambda: forecasts_for(data))
+
+@themed
+def create_forecast_chart(data, current_month="Jan_23", series=TOTAL, horizon=HORIZON):
+    predicted = forecasts(data)
+    i = data.position(current_month)
+    row = predicted.origin(i)
+    if row is None:
+        return go.Figure()  # less than two years of history to fit the season on
+    
+    k = predicted.labels.index(series) if series in predicted.labels else 0
+    horizon = max(1, min(int(horizon), HORIZON))
+    values = series_values(data, k)
+    history = list(data.months[max(0, i - 35): i + 1])
+    ahead = list(data.months[i + 1: i + 1 + horizon])
+    ahead += list(future_months(data.months[-1], horizon - len(ahead)))
+    # forecast lines start at the origin month so they join the history
+    x = [current_month] + ahead
+    holt_winters = np.concatenate([[values[i]], predicted.holt_winters[row, k, :horizon]])
+    seasonal_naive = np.concatenate([[values[i]], predicted.seasonal_naive[row, k, :horizon]])
+    band = np.concatenate([[0], predicted.band(k, horizon)])
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=history,
+        y=values[max(0, i - 35): i + 1],
+        mode="lines+markers",
+        name="Actual",
+        line=dict(color=KENYA_THEME["primary"], width=3)
+    ))
+    country = k - 1 - len(data.regions)  # the total and the regions come first in the series
+    if country >= 0:
+        # months filled in by imputation.py at their filled value, robust z-score outliers, on the history
+        shown = np.arange(max(0, i - 35), i + 1)
+        filled = data.imputation.values[country]
+        for flags, name, symbol, color, y in (
+                (data.imputation.mask, "Imputed", "circle-open", KENYA_THEME["accent"], filled),
+                (data.imputation.anomalies, "Anomaly", "x", KENYA_THEME["secondary"], values)):
+            marked = shown[flags[country, shown]]
+            if len(marked):
+                fig.add_trace(go.Scatter(
+                    x=[data.months[p] for p in marked],
+                    y=y[marked],
+                    mode="markers",
+                    name=name,
+                    marker=dict(symbol=symbol, size=14, color=color, line=dict(width=3))
+                ))
+    if i + 1 < len(data.months):
+        # an earlier origin: what came in after it, against the forecasts
+        fig.add_trace(go.Scatter(
+            x=[current_month] + list(data.months[i + 1: i + 1 + horizon]),
+            y=values[i: i + 1 + horizon],
+            mode="lines+markers",
+            name="Actual (after)",
+            line=dict(color=KENYA_THEME["dark"], dash="dot")
+        ))
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=holt_winters + band,
+        mode="lines",
+        line=dict(width=0),
+        hoverinfo="skip",
+        showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=np.clip(holt_winters - band, 0, None),
+        mode="lines",
+        line=dict(width=0),
+        fill="tonexty",
+        fillcolor="rgba(187, 0, 0, 0.15)",
+        name="80% interval",
+        hoverinfo="skip"
+    ))
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=holt_winters,
+        mode="lines+markers",
+        name="Holt-Winters",
+        line=dict(color=KENYA_THEME["secondary"], width=3)
+    ))
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=seasonal_naive,
+        mode="lines",
+        name="Seasonal naive",
+        line=dict(color=KENYA_THEME["accent"], dash="dash", width=2)
+    ))
+    
+    fig.update_layout(
+        title=f"{predicted.labels[k]}: {horizon}-Month Forecast from {current_month.replace('_', ' ')}",
+        xaxis_title="Month",
+        yaxis_title="Remittance (USD)",
+        height=400,
+        plot_bgcolor=KENYA_THEME["light"],
+        paper_bgcolor=KENYA_THEME["light"],
+        margin=dict(l=40, r=40, t=80, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=1.0, xanchor="right", x=1),
+    )
+    fig.update_xaxes(type="category")
+    
+    return fig
+
+def year_frame(data, year):
+    # up to twelve months x every country, the biggest intermediate frame; built once per dataset version
+    def build():
+        frame = data.long_frame(data.year_span(year))
+        frame = frame[frame["Value"] != 0]  # a month reported as 0 has no slice, and would zero a colour weight
+        frame["Year"] = year
+        return frame.sort_values(by="Month_Year")
+    return STORE.get_or_compute(data.version, SHARED, f"year_frame/{year}", build)
+
+@themed
+def create_sunburst_charts(data, current_month="Jan_23"):
+    import plotly.express as px  # slow import, only needed when a figure is not cached
+
     current_year = int(current_month.split('_')[1]) + 2000
-    filtered_data = df_melted[df_melted['Month_Year'] == current_month] if current_month in df_melted['Month_Year'].values else df_melted
-    year_data = df_melted[df_melted['Year'] == current_year]
+    filtered_data = data.long_frame(data.month_span(current_month))
+    filtered_data = filtered_data[filtered_data["Value"] != 0]
+    year_data = year_frame(data, current_year)
     
     # 1. Country Breakdown for Selected Month
+    # one ring of countries: a month level under every country would be a single, identical child each
     sunburst_fig1 = px.sunburst(
         filtered_data,
-        path=["Region/Country", "Month_Year"],
+        path=["Region/Country"],
         values="Value",
         title=f"<b>Country Breakdown for {current_month.replace('_', ' ')}</b>",
         labels={"Value": "Remittance (USD)"},
@@ -361,7 +605,7 @@ def create_sunburst_charts(current_month="Jan_23"):
     
     # 2. Yearly Accumulation by Month
     sunburst_fig2 = px.sunburst(
-        year_data.sort_values(by="Month_Year"),
+        year_data,
         path=["Year", "Month_Year", "Region/Country"],
         values="Value",
         title=f"<b>Yearly Accumulation ({current_year})</b>",
@@ -395,340 +639,706 @@ def create_sunburst_charts(current_month="Jan_23"):
     return sunburst_fig1, sunburst_fig2
 
 # App layout (same as before)
-app.layout = dbc.Container(
-    fluid=True,
-    style={"padding": "2rem", "backgroundColor": "#F5BB00"},
-    children=[
-        # Header Section
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.H1(
-                            "KENYA REMITTANCE DASHBOARD",
-                            className="text-center mb-2",
-                            style={"fontWeight": "bold", "letterSpacing": "1px"}
-                        ),
-                        html.P(
-                            "Tracking diaspora remittances to Kenya ('000 USD)",
-                            className="text-center",
-                            style={"fontSize": "1.1rem"}
-                        )
-                    ],
-                    style=CUSTOM_STYLES["header"]
-                ),
-                width=12
-            )
-        ),
-        
-        # Control Row
-        dbc.Row(
-            [
-                dbc.Col(
-                    [
-                        html.Label(
-                            "SELECT MONTH/YEAR:",
-                            className="font-weight-bold",
-                            style={"color": KENYA_THEME["dark"]}
-                        ),
-                        dcc.Dropdown(
-                            id="month-dropdown",
-                            options=[
-                                {"label": col.replace("_", " ").upper(), "value": col} 
-                                for col in dt.columns if col != "Region/Country"
-                            ],
-                            value="Jan_23",
-                            clearable=False,
-                            style=CUSTOM_STYLES["dropdown"]
-                        )
-                    ],
-                    md=4
-                ),
+# built once, on the first page load or in preload(); every visitor gets the same tree
+@lru_cache(maxsize=1)
+def serve_layout():
+    import dash_bootstrap_components as dbc
+
+    return dbc.Container(
+        fluid=True,
+        style={"padding": "2rem", "backgroundColor": "#F5BB00"},
+        children=[
+            # Header Section
+            dbc.Row(
                 dbc.Col(
                     html.Div(
-                        "Latest Data: " + dt.columns[-1].replace("_", " ").upper(),
-                        className="text-right pt-3",
-                        style={
-                            "color": KENYA_THEME["secondary"],
-                            "fontWeight": "bold",
-                            "fontSize": "1.1rem"
-                        }
+                        [
+                            html.H1(
+                                "KENYA REMITTANCE DASHBOARD",
+                                className="text-center mb-2",
+                                style={"fontWeight": "bold", "letterSpacing": "1px"}
+                            ),
+                            html.P(
+                                "Tracking diaspora remittances to Kenya ('000 USD)",
+                                className="text-center",
+                                style={"fontSize": "1.1rem"}
+                            )
+                        ],
+                        style=CUSTOM_STYLES["header"]
                     ),
-                    md=8,
-                    className="d-flex align-items-center justify-content-end"
+                    width=12
                 )
-            ],
-            className="mb-4"
-        ),
+            ),
         
-        # KPI Cards Row
-        dbc.Row(
-            [
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody([
-                            html.Img(src="/assets/icons/m.png", style={
-                                            "height": "100px",
-                                            "position": "absolute",
-                                            "top": "10px",
-                                            "left": "10px",
-                                            "zIndex": "1"
-                                }),
-                            dcc.Graph(id="total-indicator", config={"displayModeBar": False})
-            ]),
-                        style=CUSTOM_STYLES["card"]
+            # Control Row
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Label(
+                                "SELECT MONTH/YEAR:",
+                                className="font-weight-bold",
+                                style={"color": KENYA_THEME["dark"]}
+                            ),
+                            dcc.Dropdown(
+                                id="month-dropdown",
+                                options=[],  # filled by refresh_month_options, follows dataset reloads
+                                value="Jan_23",
+                                clearable=False,
+                                style=CUSTOM_STYLES["dropdown"]
+                            ),
+                            dcc.Store(id="data-version"),
+                            dcc.Store(id="kpi-data"),
+                            # per-tab id for session scoped server-side state (server_store.py), made in the browser
+                            dcc.Store(id="session-id", storage_type="session"),
+                            dcc.Interval(id="data-version-poll", interval=max(RELOAD_INTERVAL, 5) * 1000,
+                                         disabled=RELOAD_INTERVAL <= 0)  # no reloads, no polling
+                        ],
+                        md=4
                     ),
-                    md=4
-                ),
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody([
-                             html.Img(src="/assets/icons/month.webp", style={
-                                            "height": "100px",
-                                            "position": "absolute",
-                                            "top": "10px",
-                                            "left": "10px",
-                                            "zIndex": "1"
-                                }),
-                            dcc.Graph(id="change-indicator", config={"displayModeBar": False})
-            ]),
-                        style=CUSTOM_STYLES["card"]
+                    dbc.Col(
+                        [
+                            html.Label(
+                                "DATA VINTAGE:",
+                                className="font-weight-bold",
+                                style={"color": KENYA_THEME["dark"]}
+                            ),
+                            dcc.Dropdown(
+                                id="vintage-dropdown",
+                                options=[{"label": "LATEST", "value": LATEST}] + [
+                                    {"label": f"{release[:3].upper()} {release[3:]} RELEASE", "value": release}
+                                    for release in reversed(VINTAGES.releases if VINTAGES else [])
+                                ],
+                                value=LATEST,
+                                clearable=False,
+                                style=CUSTOM_STYLES["dropdown"]
+                            )
+                        ],
+                        md=3
                     ),
-                    md=4
-                ),
-                
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody([
-                            html.Img(src="/assets/icons/xl.png", style={
-                                            "height": "100px",
-                                            "position": "absolute",
-                                            "top": "10px",
-                                            "left": "10px",
-                                            "zIndex": "1"
-                                }),
-                            dcc.Graph(id="yoy-change-indicator", config={"displayModeBar": False})
-            ]),
-                        style=CUSTOM_STYLES["card"]
+                    dbc.Col(
+                        html.Div(
+                            id="latest-data",
+                            className="text-right pt-3",
+                            style={
+                                "color": KENYA_THEME["secondary"],
+                                "fontWeight": "bold",
+                                "fontSize": "1.1rem"
+                            }
+                        ),
+                        md=5,
+                        className="d-flex align-items-center justify-content-end"
+                    )
+                ],
+                className="mb-4"
+            ),
+        
+            # KPI Cards Row
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody([
+                                html.Img(src="/assets/icons/m.png", style={
+                                                "height": "100px",
+                                                "position": "absolute",
+                                                "top": "10px",
+                                                "left": "10px",
+                                                "zIndex": "1"
+                                    }),
+                                dcc.Graph(id="total-indicator", config={"displayModeBar": False})
+                ]),
+                            style=CUSTOM_STYLES["card"]
+                        ),
+                        md=4
                     ),
-                    md=4
-                )
-            ],
-            className="mb-4"
-        ),
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody([
+                                 html.Img(src="/assets/icons/month.webp", style={
+                                                "height": "100px",
+                                                "position": "absolute",
+                                                "top": "10px",
+                                                "left": "10px",
+                                                "zIndex": "1"
+                                    }),
+                                dcc.Graph(id="change-indicator", config={"displayModeBar": False})
+                ]),
+                            style=CUSTOM_STYLES["card"]
+                        ),
+                        md=4
+                    ),
+                
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody([
+                                html.Img(src="/assets/icons/xl.png", style={
+                                                "height": "100px",
+                                                "position": "absolute",
+                                                "top": "10px",
+                                                "left": "10px",
+                                                "zIndex": "1"
+                                    }),
+                                dcc.Graph(id="yoy-change-indicator", config={"displayModeBar": False})
+                ]),
+                            style=CUSTOM_STYLES["card"]
+                        ),
+                        md=4
+                    )
+                ],
+                className="mb-4"
+            ),
         
-        # Main Charts Row 1
-        dbc.Row(
-            [
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            [
+            # Main Charts Row 1
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
                                
-                                html.H5(
-                                    "TOP CHANGES",
-                                    className="card-title",
-                                    style={"color": KENYA_THEME["primary"]}
-                                ),
-                                dcc.Graph(id="top-changes-chart")
-                            ]
-                        ),
+                                    html.H5(
+                                        "TOP CHANGES",
+                                        className="card-title",
+                                        style={"color": KENYA_THEME["primary"]}
+                                    ),
+                                    dcc.Graph(id="top-changes-chart")
+                                ]
+                            ),
                         
-                        style=CUSTOM_STYLES["card"]
-                    ),
-                    md=6
-                ),
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            [
-                                html.H5(
-                                    "12-MONTH TREND",
-                                    className="card-title",
-                                    style={"color": KENYA_THEME["primary"]}
-                                ),
-                                dcc.Graph(id="trend-chart")
-                            ]
+                            style=CUSTOM_STYLES["card"]
                         ),
-                        style=CUSTOM_STYLES["card"]
+                        md=6
                     ),
-                    md=6
-                )
-            ],
-            className="mb-4"
-        ),
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.H5(
+                                        "TREND",
+                                        className="card-title",
+                                        style={"color": KENYA_THEME["primary"]}
+                                    ),
+                                    dbc.Row(
+                                        [
+                                            dbc.Col(
+                                                dcc.Dropdown(
+                                                    id="trend-top-n",
+                                                    options=[{"label": f"TOP {n}", "value": n} for n in TOP_N_CHOICES],
+                                                    value=TREND_TOP_N,
+                                                    clearable=False
+                                                ),
+                                                width=6
+                                            ),
+                                            dbc.Col(
+                                                dcc.Dropdown(
+                                                    id="trend-window",
+                                                    options=[{"label": f"{n} MONTHS", "value": n} for n in WINDOW_CHOICES],
+                                                    value=TREND_WINDOW,
+                                                    clearable=False
+                                                ),
+                                                width=6
+                                            )
+                                        ],
+                                        className="mb-2"
+                                    ),
+                                    dcc.Graph(id="trend-chart")
+                                ]
+                            ),
+                            style=CUSTOM_STYLES["card"]
+                        ),
+                        md=6
+                    )
+                ],
+                className="mb-4"
+            ),
         
-        # Main Charts Row 2
-        dbc.Row(
-            [
-                dbc.Col(
-                    dbc.Card(
-                        dbc.CardBody(
-                            [
-                                html.H5(
-                                    "GEOGRAPHIC DISTRIBUTION",
-                                    className="card-title",
-                                    style={"color": KENYA_THEME["primary"]}
-                                ),
-                                dcc.Graph(id="choropleth-map")
-                            ]
+            # Main Charts Row 2
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.H5(
+                                        "GEOGRAPHIC DISTRIBUTION",
+                                        className="card-title",
+                                        style={"color": KENYA_THEME["primary"]}
+                                    ),
+                                    dcc.Graph(id="choropleth-map")
+                                ]
+                            ),
+                            style=CUSTOM_STYLES["card"]
                         ),
-                        style=CUSTOM_STYLES["card"]
+                        md=6
                     ),
-                    md=6
-                ),
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.H5(
+                                        "TOP COUNTRIES",
+                                        className="card-title",
+                                        style={"color": KENYA_THEME["primary"]}
+                                    ),
+                                    dcc.Graph(id="bar-chart")
+                                ]
+                            ),
+                            style=CUSTOM_STYLES["card"]
+                        ),
+                        md=6
+                    )
+                ],
+                className="mb-4"
+            ),  
+            # Period Comparison Row
+            dbc.Row(
                 dbc.Col(
                     dbc.Card(
                         dbc.CardBody(
                             [
                                 html.H5(
-                                    "TOP COUNTRIES",
+                                    "PERIOD COMPARISON",
                                     className="card-title",
                                     style={"color": KENYA_THEME["primary"]}
                                 ),
-                                dcc.Graph(id="bar-chart")
+                                dbc.Row(
+                                    [
+                                        dbc.Col(
+                                            dcc.Dropdown(
+                                                id="period-kind",
+                                                options=[{"label": label, "value": kind} for kind, label in PERIODS.items()],
+                                                value=DEFAULT_PERIOD,
+                                                clearable=False
+                                            ),
+                                            md=4
+                                        ),
+                                        # custom range, the month options follow the dataset like month-dropdown's
+                                        dbc.Col(
+                                            dcc.Dropdown(id="period-start", options=[], placeholder="FROM"),
+                                            md=4
+                                        ),
+                                        dbc.Col(
+                                            dcc.Dropdown(id="period-end", options=[], placeholder="TO"),
+                                            md=4
+                                        )
+                                    ],
+                                    className="mb-2"
+                                ),
+                                dcc.Graph(id="period-chart"),
+                                # handle of this tab's period table in the server store, not the table itself
+                                dcc.Store(id="period-selection"),
+                                dbc.Button("DOWNLOAD CSV", id="period-download-button", color="success",
+                                           size="sm", className="mt-2"),
+                                dcc.Download(id="period-download")
                             ]
                         ),
                         style=CUSTOM_STYLES["card"]
                     ),
-                    md=6
-                )
-            ],
-            className="mb-4"
-        ),  
-        # Trend Analysis Row
-        # sunbrust chart:
-        dbc.Row(
-            [
+                    width=12
+                ),
+                className="mb-4"
+            ),
+            # Forecast Row
+            dbc.Row(
                 dbc.Col(
                     dbc.Card(
                         dbc.CardBody(
                             [
                                 html.H5(
-                                    "REMITTANCE BY COUNTRY",
+                                    "FORECAST",
                                     className="card-title",
                                     style={"color": KENYA_THEME["primary"]}
                                 ),
-                                dcc.Graph(id="sunburst-country")
+                                dbc.Row(
+                                    [
+                                        dbc.Col(
+                                            # the total, the regions and the countries, filled with the month options
+                                            dcc.Dropdown(id="forecast-series", options=[], value=TOTAL, clearable=False),
+                                            md=8
+                                        ),
+                                        dbc.Col(
+                                            dcc.Dropdown(
+                                                id="forecast-horizon",
+                                                options=[{"label": f"{n} MONTHS AHEAD", "value": n} for n in HORIZON_CHOICES],
+                                                value=HORIZON,
+                                                clearable=False
+                                            ),
+                                            md=4
+                                        )
+                                    ],
+                                    className="mb-2"
+                                ),
+                                dcc.Graph(id="forecast-chart")
                             ]
                         ),
                         style=CUSTOM_STYLES["card"]
                     ),
-                    md=6
+                    width=12
                 ),
+                className="mb-4"
+            ),
+            # Trend Analysis Row
+            # sunbrust chart:
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.H5(
+                                        "REMITTANCE BY COUNTRY",
+                                        className="card-title",
+                                        style={"color": KENYA_THEME["primary"]}
+                                    ),
+                                    dcc.Graph(id="sunburst-country")
+                                ]
+                            ),
+                            style=CUSTOM_STYLES["card"]
+                        ),
+                        md=6
+                    ),
+                    dbc.Col(
+                        dbc.Card(
+                            dbc.CardBody(
+                                [
+                                    html.H5(
+                                        "REMITTANCE BY MONTH",
+                                        className="card-title",
+                                        style={"color": KENYA_THEME["primary"]}
+                                    ),
+                                    dcc.Graph(id="sunburst-month")
+                                ]
+                            ),
+                            style=CUSTOM_STYLES["card"]
+                        ),
+                        md=6
+                    )
+                ],
+                className="mb-4"
+            ),
+        
+            # Footer
+            dbc.Row(
                 dbc.Col(
                     dbc.Card(
                         dbc.CardBody(
                             [
-                                html.H5(
-                                    "REMITTANCE BY MONTH",
-                                    className="card-title",
-                                    style={"color": KENYA_THEME["primary"]}
+                                html.H5("DATA SOURCES & METHODOLOGY", className="card-title"),
+                                html.P(
+                                    "This dashboard tracks remittance flows to Kenya from diaspora communities worldwide. "
+                                    "All amounts are shown in thousands of USD equivalent.",
+                                    className="card-text"
                                 ),
-                                dcc.Graph(id="sunburst-month")
+                                html.P([
+                                    "Data Source: ",
+                                    html.A(
+                                        "Central Bank of Kenya",
+                                        href="https://www.centralbank.go.ke/diaspora-remittances/",
+                                        target="_blank",
+                                        style={"color": KENYA_THEME["primary"]}
+                                    )
+                                ]),
+                                html.P("Missing data handling methodology:"),
+                                # reporting gaps filled for the forecasts and marked on the forecast chart (imputation.py)
+                                html.Ul(id="imputation-notes"),
+                                html.Hr(),
+                                html.Footer(
+                                    [
+                                        html.P(
+                                            "Developed by Samy Migwi | Data Scientist",
+                                            className="mb-1"
+                                        ),
+                                        html.P(
+                                            "© 2026 All Rights Reserved",
+                                            className="text-muted small"
+                                        )
+                                    ],
+                                    style={
+                                        "textAlign": "center",
+                                        "color": KENYA_THEME["dark"]
+                                    }
+                                )
                             ]
                         ),
-                        style=CUSTOM_STYLES["card"]
+                        style={
+                            "backgroundColor": KENYA_THEME["light"],
+                            "border": "none"
+                        }
                     ),
-                    md=6
+                    width=12
                 )
-            ],
-            className="mb-4"
-        ),
-        
-        # Footer
-        dbc.Row(
-            dbc.Col(
-                dbc.Card(
-                    dbc.CardBody(
-                        [
-                            html.H5("DATA SOURCES & METHODOLOGY", className="card-title"),
-                            html.P(
-                                "This dashboard tracks remittance flows to Kenya from diaspora communities worldwide. "
-                                "All amounts are shown in thousands of USD equivalent.",
-                                className="card-text"
-                            ),
-                            html.P([
-                                "Data Source: ",
-                                html.A(
-                                    "Central Bank of Kenya",
-                                    href="https://www.centralbank.go.ke/diaspora-remittances/",
-                                    target="_blank",
-                                    style={"color": KENYA_THEME["primary"]}
-                                )
-                            ]),
-                            html.P("Missing data handling methodology:"),
-                            html.Ul([
-                                html.Li("Bahamas (April 2020): Used NOCB (Next Observation Carried Backward)"),
-                                html.Li("Iraq (May 2021): Applied LOCF (Last Observation Carried Forward)"),
-                                html.Li("Iraq (June 2021): Used NOCB"),
-                                html.Li("China (April 2021): Replaced with mean from six-month window")
-                            ]),
-                            html.Hr(),
-                            html.Footer(
-                                [
-                                    html.P(
-                                        "Developed by Samy Migwi | Data Scientist",
-                                        className="mb-1"
-                                    ),
-                                    html.P(
-                                        "© 2026 All Rights Reserved",
-                                        className="text-muted small"
-                                    )
-                                ],
-                                style={
-                                    "textAlign": "center",
-                                    "color": KENYA_THEME["dark"]
-                                }
-                            )
-                        ]
-                    ),
-                    style={
-                        "backgroundColor": KENYA_THEME["light"],
-                        "border": "none"
-                    }
-                ),
-                width=12
             )
+        ]
+    )
+
+app.layout = serve_layout
+
+# every panel has its own callback so the cheap KPI cards do not wait for the sunbursts
+# panel name -> (output graph ids, builder, extra builder args)
+PANELS = {
+    "total_indicator": (["total-indicator"], create_total_indicator, ()),
+    "change_indicator_month": (["change-indicator"], create_change_indicator, ("month",)),
+    "change_indicator_year": (["yoy-change-indicator"], create_change_indicator, ("year",)),
+    "top_changes_chart": (["top-changes-chart"], create_top_changes_chart, ()),
+    "trend_chart": (["trend-chart"], create_trend_chart, ()),
+    "choropleth_map": (["choropleth-map"], create_choropleth_map, ()),
+    "bar_chart": (["bar-chart"], create_bar_chart, ()),
+    "period_chart": (["period-chart"], create_period_chart, ()),
+    "forecast_chart": (["forecast-chart"], create_forecast_chart, ()),
+    "sunburst_charts": (["sunburst-country", "sunburst-month"], create_sunburst_charts, ()),
+}
+
+# panel name -> ((control id, default), ...): extra callback inputs, passed to the builder after the PANELS args
+PANEL_CONTROLS = {
+    "trend_chart": (("trend-top-n", TREND_TOP_N), ("trend-window", TREND_WINDOW)),
+    "period_chart": (("period-kind", DEFAULT_PERIOD), ("period-start", None), ("period-end", None)),
+    "forecast_chart": (("forecast-series", TOTAL), ("forecast-horizon", HORIZON)),
+}
+
+def panel_options(panel, values):
+    # () while every control is at its default, which is what prerender.py built and what the cache key leaves out
+    defaults = tuple(default for _, default in PANEL_CONTROLS.get(panel, ()))
+    values = tuple(default if value is None else value for value, default in zip(values, defaults))
+    if panel == "period_chart" and values[0] != "custom":
+        values = (values[0], None, None)  # FROM/TO only count for a custom range
+    return () if values == defaults else values
+
+def build_panel_json(data, panel, month, options=()):
+    # json for one panel: a figure, or an array of figures for multi-output panels
+    outputs, build, args = PANELS[panel]
+    payload = FIGURES.get_or_build(panel, data, month, lambda: build(data, month, *args, *options), options)
+    return "[" + ",".join(payload) + "]" if isinstance(payload, tuple) else payload
+
+def panel_figures(data, panel, month, options=()):
+    with timed(panel):
+        # pre-rendered payload first, live (cached) figure building only on a miss
+        with timed(panel, "compute"):
+            payload = None if options else PRERENDERED.read(data.version, month, panel)
+        if payload is None:
+            payload = build_panel_json(data, panel, month, options)
+        with timed(panel, "decode"):
+            figures = json.loads(payload)
+    return figures if len(PANELS[panel][0]) > 1 else [figures]
+
+@lru_cache(maxsize=8)
+def vintage_dataset(release):
+    # a published release never changes, so its dataset is built once
+    return from_frames(*VINTAGES.frames(release))
+
+def dataset_for(vintage=LATEST):
+    if vintage == LATEST or VINTAGES is None:
+        return DATA.current()
+    return vintage_dataset(vintage)
+
+# the KPI cards are drawn in the browser from kpi-data (assets/kpi.js), they never reach the server
+CLIENTSIDE_PANELS = {
+    "total_indicator": "total",
+    "change_indicator_month": "monthChange",
+    "change_indicator_year": "yearChange",
+}
+
+def kpi_store(data):
+    # everything assets/kpi.js needs: ~75 region totals plus the styling of the server-side figures
+    cube = data.cube
+    return {
+        "months": list(data.months),
+        "index": dict(data.month_index),
+        "totals": cube.region_totals.tolist(),
+        "yoy": cube.yoy_position.tolist(),
+        "template": json.loads(serialize(create_total_indicator(data, data.latest_month())))["layout"]["template"],
+        "empty": json.loads(serialize(go.Figure())),
+    }
+
+def register_panel_callback(panel):
+    outputs = PANELS[panel][0]
+
+    @app.callback(
+        [Output(graph_id, "figure") for graph_id in outputs],
+        [Input("month-dropdown", "value"),
+         Input("vintage-dropdown", "value")]
+        + [Input(control, "value") for control, _ in PANEL_CONTROLS.get(panel, ())]
+    )
+    def update_panel(selected_month, vintage, *controls):
+        # one dataset per request, a reload half way through does not mix versions
+        data = dataset_for(vintage)
+        if selected_month not in data.month_index:
+            raise PreventUpdate  # older vintage, refresh_month_options moves the month first
+        return panel_figures(data, panel, selected_month, panel_options(panel, controls))
+
+    return update_panel
+
+# Callback implementation
+for panel_name in PANELS:
+    if panel_name in CLIENTSIDE_PANELS:
+        app.clientside_callback(
+            ClientsideFunction(namespace="kpi", function_name=CLIENTSIDE_PANELS[panel_name]),
+            Output(PANELS[panel_name][0][0], "figure"),
+            [Input("month-dropdown", "value"), Input("kpi-data", "data")]
         )
-    ]
+    else:
+        register_panel_callback(panel_name)
+
+@app.callback(
+    [Output("month-dropdown", "options"),
+     Output("month-dropdown", "value"),
+     Output("latest-data", "children"),
+     Output("data-version", "data"),
+     Output("kpi-data", "data"),
+     Output("period-start", "options"),
+     Output("period-end", "options"),
+     Output("forecast-series", "options"),
+     Output("imputation-notes", "children")],
+    [Input("data-version-poll", "n_intervals"),
+     Input("vintage-dropdown", "value")],
+    [State("data-version", "data"),
+     State("month-dropdown", "value")]
 )
+def refresh_month_options(_, vintage, known_version, selected_month):
+    data = dataset_for(vintage)
+    if data.version == known_version:
+        return (no_update,) * 9
+    options = [{"label": col.replace("_", " ").upper(), "value": col} for col in data.months]
+    month = selected_month if selected_month in data.month_index else data.latest_month()
+    latest = "Latest Data: " + data.latest_month().replace("_", " ").upper()
+    if vintage != LATEST:
+        latest += f" ({vintage} release)"
+    series = [{"label": label.upper(), "value": label} for label in forecasts(data).labels]
+    filled = [html.Li(line) for line in imputation_notes(data.imputation, data.dimension.names, data.months)]
+    return options, month, latest, data.version, kpi_store(data), options, options, series, filled
+
+app.clientside_callback(
+    ClientsideFunction(namespace="session", function_name="ensureId"),
+    Output("session-id", "data"),
+    Input("session-id", "data")
+)
+
+def period_selection(data, session, month, kind=DEFAULT_PERIOD, first=None, last=None):
+    # (handle, frame) of the period table, kept under this tab's session
+    period = resolve(data, kind, month, first, last)
+    name = f"period/{kind}/{period.start}-{period.stop}"
+    frame = STORE.get_or_compute(data.version, session, name, lambda: table(data, kind, period))
+    return make_handle(data.version, session, name), frame
 
-# Callback implementation
 @app.callback(
-    [Output("total-indicator", "figure"),
-     Output("change-indicator", "figure"),
-     Output("yoy-change-indicator", "figure"),
-     Output("top-changes-chart", "figure"),
-     Output("trend-chart", "figure"),
-     Output("choropleth-map", "figure"),
-     Output("bar-chart", "figure"),
-     Output("sunburst-country", "figure"),  # New output
-     Output("sunburst-month", "figure")],   # New output
-    [Input("month-dropdown", "value")]
+    Output("period-selection", "data"),
+    [Input("month-dropdown", "value"),
+     Input("vintage-dropdown", "value"),
+     Input("period-kind", "value"),
+     Input("period-start", "value"),
+     Input("period-end", "value"),
+     Input("session-id", "data")]
 )
-def update_dashboard(selected_month):
-    total_fig = create_total_indicator(selected_month)
-    change_fig = create_change_indicator(selected_month, "month")
-    yoy_change_fig = create_change_indicator(selected_month, "year")
-    changes_chart = create_top_changes_chart(selected_month)
-    trend_chart = create_trend_chart(selected_month)
-    choropleth_fig = create_choropleth_map(selected_month)
-    bar_fig = create_bar_chart(selected_month)
-    sunburst_country, sunburst_month = create_sunburst_charts(selected_month)  # unpack both figures we need some improvement here on my sunbust chart
-    
-    return (
-        total_fig, 
-        change_fig, 
-        yoy_change_fig,
-        changes_chart, 
-        trend_chart, 
-        choropleth_fig, 
-        bar_fig,
-        sunburst_country,  # country-focused sunburst more polishing need here
-        sunburst_month    # Month-focused sunburst
-    )
+def select_period(selected_month, vintage, kind, first, last, session):
+    if not session:
+        raise PreventUpdate  # session.js sets it right after the page loads
+    data = dataset_for(vintage)
+    if selected_month not in data.month_index:
+        raise PreventUpdate
+    return period_selection(data, session, selected_month, kind, first, last)[0]
+
+@app.callback(
+    Output("period-download", "data"),
+    Input("period-download-button", "n_clicks"),
+    [State("period-selection", "data"),
+     State("session-id", "data"),
+     State("month-dropdown", "value"),
+     State("vintage-dropdown", "value"),
+     State("period-kind", "value"),
+     State("period-start", "value"),
+     State("period-end", "value")],
+    prevent_initial_call=True
+)
+def download_period(_, handle, session, selected_month, vintage, kind, first, last):
+    # the request carries the handle, the frame comes out of the server store
+    frame = STORE.get(handle, session) if handle else None
+    if frame is None:
+        # evicted everywhere (or not selected yet), derive it again from the controls
+        data = dataset_for(vintage)
+        if not session or selected_month not in data.month_index:
+            raise PreventUpdate
+        frame = period_selection(data, session, selected_month, kind, first, last)[1]
+    return dcc.send_data_frame(frame.to_csv, f"remittances_{kind}_{selected_month}.csv", index=False)
+
+def update_dashboard(selected_month, vintage=LATEST):
+    # all eleven figures in one go (offline rendering, stress tests); the app itself uses the panel callbacks
+    data = dataset_for(vintage)
+    figures = []
+    for panel in PANELS:
+        figures.extend(panel_figures(data, panel, selected_month))
+    return tuple(figures)
+
+def callback_version(inputs):
+    # panel callbacks depend on nothing but the month, the vintage, their PANEL_CONTROLS and the dataset behind it
+    if "month-dropdown.value" not in inputs:
+        return None
+    try:
+        return dataset_for(inputs.get("vintage-dropdown.value", LATEST)).version
+    except KeyError:
+        return None
+
+def payload_for(version, month, panel):
+    if panel not in PANELS:
+        return None
+    candidates = [DATA.current()] + [vintage_dataset(release) for release in (VINTAGES.releases if VINTAGES else [])]
+    for data in candidates:
+        if data.version == version and month in data.month_index:
+            return build_panel_json(data, panel, month)
+    return None
+
+def cached_panel_response(inputs, outputs):
+    # a repeat panel callback answered with the stored figure JSON, Dash never decodes or re-encodes it
+    panel = PANEL_OUTPUTS.get(tuple(output.get("id") for output in outputs)) if isinstance(outputs, list) else None
+    if panel is None:
+        return None
+    data = dataset_for(inputs.get("vintage-dropdown.value", LATEST))
+    month = inputs.get("month-dropdown.value")
+    if month not in data.month_index:
+        return None
+    options = panel_options(panel, [inputs.get(f"{control}.value") for control, _ in PANEL_CONTROLS.get(panel, ())])
+    payload = FIGURES.get(panel, data, month, options)
+    if payload is None and not options and len(PANELS[panel][0]) == 1:
+        # a multi-output pre-rendered payload is one array, splitting it means decoding, left to the Dash path
+        payload = PRERENDERED.read(data.version, month, panel)
+    if payload is None:
+        return None
+    figures = payload if isinstance(payload, tuple) else (payload,)
+    return '{"multi":true,"response":{' + ",".join(
+        f'{json.dumps(graph_id)}:{{"figure":{figure}}}' for graph_id, figure in zip(PANELS[panel][0], figures)
+    ) + "}}"
+
+# server-side panel callbacks by their output ids, what a callback request body names
+PANEL_OUTPUTS = {tuple(PANELS[panel][0]): panel for panel in PANELS if panel not in CLIENTSIDE_PANELS}
+
+# ETags on panel callbacks, cached figures answered before Dash and the CDN-cacheable
+# /payload/<version>/<month>/<panel> route
+install_http_cache(server, callback_version, payload_for, PRERENDERED, PANELS, cached_panel_response)
+
+def preload():
+    """Do the lazy work up front and return the WSGI app.
+
+    wsgi.py calls this in the gunicorn master (preload_app), so every forked
+    worker shares the dataset, the vintages, the figure template and the
+    layout copy-on-write instead of building its own on its first request.
+    """
+    import plotly.express  # noqa: F401
+
+    data = DATA.current()
+    for release in VINTAGES.releases if VINTAGES else []:
+        vintage_dataset(release)
+    figure_template()
+    serve_layout()
+    kpi_store(data)
+    forecasts(data)
+    return server
+
+def start_dataset_watcher():
+    global WATCHER
+    if WATCHER is None:
+        WATCHER = start_watcher(DATA)
+    return WATCHER
 
 if __name__ == "__main__":
-    #I should remove _server....  host='0.0.0.0',port=8050 for local development
+    # local development server; production runs gunicorn with src/gunicorn.conf.py (see wsgi.py)
+    start_dataset_watcher()
     app.run_server(debug=True,host='0.0.0.0',port=8050)
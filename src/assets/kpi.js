@@ -0,0 +1,112 @@
+/*
+ * Client-side KPI cards.
+ *
+ * The three indicator cards only need the region total of two months. The
+ * server ships the per-month totals once per dataset version in the
+ * "kpi-data" store (see kpi_store in app.py) and these functions rebuild the
+ * same figures create_total_indicator / create_change_indicator return, so
+ * picking a month does not send a request for them.
+ */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    kpi: (function () {
+        var THEME = {primary: "#007336", secondary: "#BB0000", dark: "#000000", light: "#FFFFFF"};
+
+        function label(month) {
+            return month.replace("_", " ").toUpperCase();
+        }
+
+        function layout(kpi, extra) {
+            return Object.assign({
+                template: kpi.template,
+                plot_bgcolor: THEME.light,
+                paper_bgcolor: THEME.light,
+                height: 180
+            }, extra);
+        }
+
+        function number(value, prefix, size, color, title, domain) {
+            return {
+                type: "indicator",
+                mode: "number",
+                value: value,
+                number: {prefix: prefix, valueformat: ",", font: {size: size, family: "Arial", color: color}},
+                title: title,
+                domain: domain
+            };
+        }
+
+        function total(month, kpi) {
+            if (!kpi || !month || !(month in kpi.index)) {
+                return window.dash_clientside.no_update;
+            }
+            var value = kpi.totals[kpi.index[month]];
+            return {
+                data: [number(
+                    value,
+                    "<span style='font-size:0.6em; color:" + THEME.dark + "'>$</span>",
+                    48, THEME.dark,
+                    {
+                        text: "<b>TOTAL REMITTANCES (" + label(month) + ")</b>",
+                        font: {size: 20, family: "Arial", color: THEME.secondary},
+                        align: "center"
+                    },
+                    {x: [0, 1], y: [0, 1]}
+                )],
+                layout: layout(kpi, {margin: {l: 20, r: 20, t: 60, b: 20}})
+            };
+        }
+
+        function change(month, kpi, comparison) {
+            if (!kpi || !month || !(month in kpi.index)) {
+                return window.dash_clientside.no_update;
+            }
+            var i = kpi.index[month];
+            var j = comparison === "month" ? i - 1 : kpi.yoy[i];
+            if (j < 0) {
+                return kpi.empty;
+            }
+            var current = kpi.totals[i];
+            var previous = kpi.totals[j];
+            var difference = current - previous;
+            // same rule as aggregates._pct: no base, no percentage
+            var pct = previous !== 0 ? difference / previous * 100 : 0;
+            var color = difference >= 0 ? THEME.primary : THEME.secondary;
+            var arrow = difference >= 0 ? "▲" : "▼";
+            var title = (comparison === "month" ? "MONTHLY CHANGE FROM " : "YEARLY CHANGE FROM ") + label(kpi.months[j]);
+            var small = function (text) {
+                return {text: text, font: {size: 12, family: "Arial", color: THEME.dark}};
+            };
+            var percentage = {
+                type: "indicator",
+                mode: "number",
+                value: Math.abs(pct),
+                number: {suffix: "%", valueformat: ".1f", font: {size: 20, family: "Arial", color: color}},
+                title: small("PERCENTAGE CHANGE"),
+                domain: {x: [0.3, 0.7], y: [0.1, 0.2]}
+            };
+            return {
+                data: [
+                    number(
+                        Math.abs(difference),
+                        "<span style='color:" + color + ";font-size:0.5em'>" + arrow + " $</span>",
+                        32, color,
+                        {text: "<b>" + title + "</b>", font: {size: 14, family: "Arial", color: THEME.dark}},
+                        {x: [0.3, 0.7], y: [0.6, 0.9]}
+                    ),
+                    number(current, "<span style='font-size:0.5em'>$</span>", 20, THEME.dark,
+                           small(label(month) + " TOTAL"), {x: [0.1, 0.45], y: [0.2, 0.4]}),
+                    number(previous, "<span style='font-size:0.5em'>$</span>", 20, THEME.dark,
+                           small(label(kpi.months[j]) + " TOTAL"), {x: [0.55, 0.9], y: [0.2, 0.4]}),
+                    percentage
+                ],
+                layout: layout(kpi, {margin: {l: 10, r: 10, t: 50, b: 10}, font: {family: "Arial"}})
+            };
+        }
+
+        return {
+            total: total,
+            monthChange: function (month, kpi) { return change(month, kpi, "month"); },
+            yearChange: function (month, kpi) { return change(month, kpi, "year"); }
+        };
+    })()
+});
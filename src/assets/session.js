@@ -0,0 +1,18 @@
+/*
+ * Per-tab session id for server-side state (server_store.py). Kept in
+ * sessionStorage by the "session-id" dcc.Store, made here so it costs no
+ * request.
+ */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    session: {
+        ensureId: function (current) {
+            if (current) {
+                return window.dash_clientside.no_update;
+            }
+            if (window.crypto && window.crypto.randomUUID) {
+                return window.crypto.randomUUID();
+            }
+            return Date.now().toString(36) + Math.random().toString(36).slice(2);
+        }
+    }
+});
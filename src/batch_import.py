@@ -0,0 +1,245 @@
+"""Batch import of the whole data/raw archive into one reconciled history.
+
+Every workbook is identified by the sha1 of its bytes, so duplicates
+(AugustNew.xlsx / Augustxl.xlsx) are parsed once and a file that was parsed
+before is never opened again: its tables come from ``<cache>/<sha1>.npz``. A
+manifest of (size, mtime) per file lets an unchanged directory skip hashing
+too. Workbooks that are not in the cache are parsed in a process pool with
+``etl.read_workbook``.
+
+The vintages are then laid over each other oldest first (ordered by their last
+month), so where releases overlap the later one wins, and every value a later
+release restates is written to a revision log next to the snapshot. All the
+vintages are also kept in the snapshot's vintage store (vintages.py).
+
+    python src/batch_import.py                      # data/raw -> snapshot feb26
+    python src/batch_import.py --snapshot history --workers 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_store import (
+    DATA_DIR, LABEL_COLUMN, RELEASE, SNAPSHOT_DIR, has_snapshot, read_meta, snapshot_path,
+    write_meta, write_snapshot,
+)
+from dataset import parse_months
+from etl import RAW_DIR, UnsupportedWorkbook, raw_workbooks, read_workbook, release_name
+from ingest import TOLERANCE
+from vintages import VINTAGE_FILE, VintageStore
+
+CACHE_DIR = DATA_DIR / "parsed"
+MANIFEST = "manifest.json"
+
+
+def file_hash(path, chunk=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest(cache_dir):
+    try:
+        return json.loads((Path(cache_dir) / MANIFEST).read_text())
+    except FileNotFoundError:
+        return {"files": {}, "unsupported": {}}
+
+
+def _save_manifest(cache_dir, manifest):
+    tmp = Path(cache_dir) / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(tmp, Path(cache_dir) / MANIFEST)
+
+
+def hash_files(paths, manifest):
+    """name -> sha1, rehashing only files whose size or mtime changed."""
+    hashes, files = {}, {}
+    for path in paths:
+        stat = path.stat()
+        known = manifest["files"].get(path.name)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            sha = known["sha1"]
+        else:
+            sha = file_hash(path)
+        hashes[path.name] = sha
+        files[path.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha}
+    manifest["files"] = files
+    return hashes
+
+
+def _parse(path):
+    # runs in a worker process
+    try:
+        df, dt, _ = read_workbook(path)
+    except UnsupportedWorkbook as exc:
+        return None, str(exc)
+    return (df, dt), None
+
+
+def _write_entry(cache_dir, sha, df, dt):
+    months = [col for col in df.columns if col != LABEL_COLUMN]
+    tmp = Path(cache_dir) / f"{sha}.tmp.npz"
+    np.savez(
+        tmp,
+        months=np.array(months),
+        countries=df[LABEL_COLUMN].to_numpy(dtype=str),
+        regions=dt[LABEL_COLUMN].to_numpy(dtype=str),
+        country_values=df[months].to_numpy(dtype=np.float64),
+        region_values=dt[months].to_numpy(dtype=np.float64),
+    )
+    os.replace(tmp, Path(cache_dir) / f"{sha}.npz")
+
+
+def _read_entry(cache_dir, sha):
+    with np.load(Path(cache_dir) / f"{sha}.npz") as entry:
+        months = entry["months"].tolist()
+        return {
+            "months": months,
+            "countries": (entry["countries"].tolist(), entry["country_values"]),
+            "regions": (entry["regions"].tolist(), entry["region_values"]),
+        }
+
+
+def parse_missing(paths_by_sha, cache_dir, manifest, workers=None):
+    """Parse every hash that has no cache entry yet; returns the hashes parsed."""
+    missing = {
+        sha: path for sha, path in paths_by_sha.items()
+        if sha not in manifest["unsupported"] and not (Path(cache_dir) / f"{sha}.npz").exists()
+    }
+    if not missing:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for sha, (frames, error) in zip(missing, pool.map(_parse, missing.values())):
+            if error:
+                manifest["unsupported"][sha] = error
+            else:
+                _write_entry(cache_dir, sha, *frames)
+    return list(missing)
+
+
+def _month_key(month):
+    years, numbers = parse_months([month])
+    return int(years[0]) * 12 + int(numbers[0])
+
+
+def reconcile(vintages):
+    """Lay (release, entry) vintages over each other, oldest first; later releases win.
+
+    Returns ({"countries": df, "regions": df}, revisions) where revisions lists
+    every value a later release changed.
+    """
+    months = sorted({m for _, entry in vintages for m in entry["months"]}, key=_month_key)
+    month_pos = {m: i for i, m in enumerate(months)}
+    frames, revisions = {}, []
+    for part in ("countries", "regions"):
+        # row order of the newest release, rows only older releases have go last
+        labels = []
+        for _, entry in reversed(vintages):
+            labels += [label for label in entry[part][0] if label not in labels]
+        row_pos = {label: i for i, label in enumerate(labels)}
+        history = np.full((len(labels), len(months)), np.nan)
+        seen = np.zeros(history.shape, dtype=bool)
+
+        for release, entry in vintages:
+            rows = np.array([row_pos[label] for label in entry[part][0]], dtype=np.intp)
+            cols = np.array([month_pos[m] for m in entry["months"]], dtype=np.intp)
+            block = np.ix_(rows, cols)
+            values = entry[part][1]
+            old = history[block]
+            changed = seen[block] & ~np.isclose(old, values, rtol=0, atol=TOLERANCE, equal_nan=True)
+            for r, c in zip(*np.nonzero(changed)):
+                revisions.append({
+                    "release": release, "part": part, LABEL_COLUMN: labels[rows[r]],
+                    "month": months[cols[c]], "previous": old[r, c], "value": values[r, c],
+                })
+            history[block] = values
+            seen[block] = True
+
+        frame = pd.DataFrame(history, columns=months)
+        frame.insert(0, LABEL_COLUMN, labels)
+        frames[part] = frame
+    return frames, revisions
+
+
+def run(raw_dir=RAW_DIR, snapshot=RELEASE, snapshot_dir=SNAPSHOT_DIR, cache_dir=CACHE_DIR, workers=None):
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(cache_dir)
+    paths = raw_workbooks(raw_dir)
+    hashes = hash_files(paths, manifest)
+
+    paths_by_sha = {}
+    for path in paths:
+        paths_by_sha.setdefault(hashes[path.name], path)  # byte-identical copies parse once
+    parsed = parse_missing(paths_by_sha, cache_dir, manifest, workers)
+    _save_manifest(cache_dir, manifest)
+
+    sources = sorted(sha for sha in paths_by_sha if sha not in manifest["unsupported"])
+    report = {
+        "files": len(paths),
+        "unique": len(paths_by_sha),
+        "parsed": len(parsed),
+        "unsupported": sorted(paths_by_sha[sha].name for sha in paths_by_sha if sha in manifest["unsupported"]),
+        "up_to_date": False,
+    }
+    target = snapshot_path(snapshot, snapshot_dir)
+    if has_snapshot(snapshot, snapshot_dir) and read_meta(target).get("sources") == sources:
+        report["up_to_date"] = True
+        return report
+
+    vintages = []
+    for sha in sources:
+        entry = _read_entry(cache_dir, sha)
+        vintages.append((_month_key(entry["months"][-1]), paths_by_sha[sha].name, sha, entry))
+    vintages.sort(key=lambda vintage: vintage[:2])
+    named = [(release_name(entry["months"]), entry) for *_, entry in vintages]
+
+    frames, revisions = reconcile(named)
+    release = named[-1][0]
+    write_snapshot(frames["countries"], frames["regions"], snapshot, snapshot_dir)
+    pd.DataFrame(revisions, columns=["release", "part", LABEL_COLUMN, "month", "previous", "value"]).to_csv(
+        target / "revisions.csv", index=False)
+
+    # every vintage stays queryable (as-of reads, release diffs) at the cost of its revisions only
+    VintageStore.build(named).save(target / VINTAGE_FILE)
+
+    meta = read_meta(target)
+    meta["release"] = release
+    meta["releases"] = [name for name, _ in named]
+    meta["sources"] = sources
+    write_meta(target, meta)
+    report.update(release=release, releases=meta["releases"], revisions=len(revisions))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import every workbook in data/raw into one snapshot")
+    parser.add_argument("--raw-dir", default=RAW_DIR, type=Path)
+    parser.add_argument("--snapshot", default=RELEASE, help="snapshot to write (REMITTANCE_RELEASE)")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, type=Path)
+    parser.add_argument("--cache-dir", default=CACHE_DIR, type=Path)
+    parser.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = run(args.raw_dir, args.snapshot, args.snapshot_dir, args.cache_dir, args.workers)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{report['files']} workbooks, {report['unique']} unique, {report['parsed']} parsed, "
+          f"skipped {report['unsupported']}")
+    if report["up_to_date"]:
+        print(f"snapshot {args.snapshot} is up to date ({elapsed:.0f} ms)")
+        return
+    print(f"{' -> '.join(report['releases'])} reconciled into {args.snapshot}, "
+          f"{report['revisions']} revised values logged ({elapsed:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Country dimension: CBK row labels resolved to ISO-3 codes once, not on every render.
+
+The source rows are labelled the way the CBK workbook prints them: indented
+with spaces and spelled "U.S.A", "Saudia Arabia", "New zealand". Plotly's
+``locationmode="country names"`` matched those strings in the browser on every
+render and silently left out whatever it did not recognise. ``country_dimension``
+maps each label to a display name, its ISO-3 code and the CBK region it is
+reported under; a label missing from ``COUNTRIES`` raises ``UnknownCountry``,
+so a new spelling stops the snapshot write (data_store.write_snapshot) instead
+of dropping off the map. Every dataset resolves its labels strictly too, so
+the CSV, URL and vintage paths fail the same way. Only the synthetic frames of
+the benchmarks are built with ``from_frames(..., strict=False)``: an unknown
+label keeps its stripped text as the name and gets no ISO-3 code.
+
+The choropleth draws ISO-3 locations on a trimmed GeoJSON of just these
+countries, served once as a static asset (``GEOJSON``):
+
+    python src/countries.py --geojson naturalearth_lowres.shp    # or a .geojson with ISO-3 ids
+"""
+import argparse
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+GEOJSON = Path(__file__).resolve().parent / "assets" / "geo" / "countries.geo.json"
+COORDINATE_DECIMALS = 2  # about a kilometre, far below what a 400px world map shows
+
+# normalized label -> (display name, ISO-3, CBK region)
+COUNTRIES = {
+    "usa": ("United States", "USA", "America"),
+    "united states": ("United States", "USA", "America"),
+    "canada": ("Canada", "CAN", "America"),
+    "bahamas": ("Bahamas", "BHS", "America"),
+    "united kingdom": ("United Kingdom", "GBR", "Europe"),
+    "uk": ("United Kingdom", "GBR", "Europe"),
+    "germany": ("Germany", "DEU", "Europe"),
+    "switzerland": ("Switzerland", "CHE", "Europe"),
+    "netherlands": ("Netherlands", "NLD", "Europe"),
+    "italy": ("Italy", "ITA", "Europe"),
+    "sweden": ("Sweden", "SWE", "Europe"),
+    "france": ("France", "FRA", "Europe"),
+    "norway": ("Norway", "NOR", "Europe"),
+    "belgium": ("Belgium", "BEL", "Europe"),
+    "austria": ("Austria", "AUT", "Europe"),
+    "saudi arabia": ("Saudi Arabia", "SAU", "Asia"),
+    "saudia arabia": ("Saudi Arabia", "SAU", "Asia"),
+    "qatar": ("Qatar", "QAT", "Asia"),
+    "united arab emirates": ("United Arab Emirates", "ARE", "Asia"),
+    "uae": ("United Arab Emirates", "ARE", "Asia"),
+    "bahrain": ("Bahrain", "BHR", "Asia"),
+    "india": ("India", "IND", "Asia"),
+    "oman": ("Oman", "OMN", "Asia"),
+    "japan": ("Japan", "JPN", "Asia"),
+    "iraq": ("Iraq", "IRQ", "Asia"),
+    "china": ("China", "CHN", "Asia"),
+    "south africa": ("South Africa", "ZAF", "Africa"),
+    "tanzania": ("Tanzania", "TZA", "Africa"),
+    "uganda": ("Uganda", "UGA", "Africa"),
+    "nigeria": ("Nigeria", "NGA", "Africa"),
+    "ivory coast": ("Ivory Coast", "CIV", "Africa"),
+    "cote d'ivoire": ("Ivory Coast", "CIV", "Africa"),
+    "zambia": ("Zambia", "ZMB", "Africa"),
+    "south sudan": ("South Sudan", "SSD", "Africa"),
+    "egypt": ("Egypt", "EGY", "Africa"),
+    "malawi": ("Malawi", "MWI", "Africa"),
+    "australia": ("Australia", "AUS", "Australia and Oceania"),
+    "new zealand": ("New Zealand", "NZL", "Australia and Oceania"),
+}
+
+# too small for the 1:110m shapes, drawn as their bounding box (lon min, lat min, lon max, lat max)
+BOUNDING_BOXES = {
+    "BHR": (50.38, 25.79, 50.82, 26.29),
+}
+
+
+class UnknownCountry(ValueError):
+    """A row label that is not in COUNTRIES."""
+
+
+@dataclass(frozen=True)
+class CountryDimension:
+    labels: tuple    # source labels, row order of the data
+    names: tuple     # display names
+    iso3: tuple
+    regions: tuple   # CBK region each country is reported under
+
+
+def normalize(label):
+    # "     U.S.A" -> "usa", "New  zealand" -> "new zealand"
+    return re.sub(r"\s+", " ", label.replace(".", "")).strip().casefold()
+
+
+@lru_cache(maxsize=16)
+def _dimension(labels, strict):
+    unknown = [label for label in labels if normalize(label) not in COUNTRIES]
+    if unknown and strict:
+        raise UnknownCountry(f"no ISO-3 code for {', '.join(repr(label) for label in unknown)}; add them to countries.COUNTRIES")
+    rows = [COUNTRIES.get(normalize(label), (label.strip(), "", "")) for label in labels]
+    names, iso3, regions = zip(*rows) if rows else ((), (), ())
+    return CountryDimension(labels, names, iso3, regions)
+
+
+def country_dimension(labels, strict=True):
+    """Resolve row labels (in order) to names, ISO-3 codes and regions."""
+    return _dimension(tuple(labels), strict)
+
+
+def _round(coordinates):
+    if isinstance(coordinates[0], (int, float)):
+        return [round(value, COORDINATE_DECIMALS) for value in coordinates]
+    return [_round(part) for part in coordinates]
+
+
+def _source_features(path):
+    path = Path(path)
+    if path.suffix == ".shp":
+        import shapefile  # pyshp, only needed to convert a Natural Earth shapefile
+
+        reader = shapefile.Reader(str(path))
+        return [(record.as_dict().get("iso_a3") or record.as_dict().get("ADM0_A3"), shape.__geo_interface__)
+                for record, shape in zip(reader.records(), reader.shapes())]
+    features = json.loads(path.read_text())["features"]
+    return [(feature.get("id") or feature["properties"].get("ISO_A3") or feature["properties"].get("ADM0_A3"),
+             feature["geometry"]) for feature in features]
+
+
+def build_geojson(source, target=GEOJSON, iso3=None):
+    """Keep the countries of COUNTRIES (or ``iso3``), ISO-3 as feature id, coordinates rounded."""
+    wanted = {code: name for name, code, _ in COUNTRIES.values()} if iso3 is None else dict.fromkeys(iso3)
+    features = {}
+    for code, geometry in _source_features(source):
+        if code in wanted and code not in features:
+            features[code] = {"type": "Feature", "id": code, "properties": {"name": wanted[code]},
+                              "geometry": {"type": geometry["type"], "coordinates": _round(geometry["coordinates"])}}
+    for code, (x0, y0, x1, y1) in BOUNDING_BOXES.items():
+        if code in wanted and code not in features:
+            features[code] = {"type": "Feature", "id": code, "properties": {"name": wanted[code]},
+                              "geometry": {"type": "Polygon",
+                                           "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]}}
+    missing = sorted(set(wanted) - set(features))
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    collection = {"type": "FeatureCollection", "features": [features[code] for code in sorted(features)]}
+    target.write_text(json.dumps(collection, separators=(",", ":")))
+    return len(features), missing, target.stat().st_size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--geojson", metavar="SOURCE", required=True,
+                        help="Natural Earth admin-0 countries, .shp (needs pyshp) or .geojson")
+    parser.add_argument("--out", default=GEOJSON, type=Path)
+    args = parser.parse_args(argv)
+
+    count, missing, size = build_geojson(args.geojson, args.out)
+    print(f"{count} countries, {size:,} bytes -> {args.out}")
+    if missing:
+        print(f"no shape for {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Local data store for the dashboard.
+
+The app used to pull feb26.csv / region_feb26.csv from raw.githubusercontent.com
+at import time. This module reads the processed CSVs from a local directory
+instead, or from a pre-built binary snapshot (one .npy file per matrix plus a
+small json file with the labels) that is memory-mapped on load.
+
+The matrices are stored month-major, (months, rows), so a new CBK month is
+appended to the end of each file and a revised month is one contiguous row;
+see ingest.py.
+
+Build the snapshot once (at deploy time) with:
+
+    python src/data_store.py --release feb26
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from countries import country_dimension
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# all of these can be overridden from the environment (render.yaml, gunicorn, ...)
+DATA_DIR = Path(os.environ.get("REMITTANCE_DATA_DIR", REPO_ROOT / "data" / "processed"))
+SNAPSHOT_DIR = Path(os.environ.get("REMITTANCE_SNAPSHOT_DIR", DATA_DIR / "snapshot"))
+RELEASE = os.environ.get("REMITTANCE_RELEASE", "feb26")
+
+# old behaviour, only used when asked for explicitly (benchmarks, no local checkout)
+GITHUB_URL = "https://raw.githubusercontent.com/samy-migwi/Kenya-remittance-dashboard/main/data/processed"
+
+LABEL_COLUMN = "Region/Country"
+
+
+def csv_names(release=RELEASE):
+    # country file and region file for one CBK release, e.g. feb26.csv / region_feb26.csv
+    return f"{release}.csv", f"region_{release}.csv"
+
+
+def load_csv(release=RELEASE, data_dir=DATA_DIR):
+    import pandas as pd  # imported on first use here, in dataset.py and vintages.py: a third of the app's import time
+
+    country_name, region_name = csv_names(release)
+    df = pd.read_csv(Path(data_dir) / country_name)
+    dt = pd.read_csv(Path(data_dir) / region_name)
+    return df, dt
+
+
+def load_url(release=RELEASE, base_url=GITHUB_URL):
+    import pandas as pd
+
+    country_name, region_name = csv_names(release)
+    df = pd.read_csv(f"{base_url}/{country_name}")
+    dt = pd.read_csv(f"{base_url}/{region_name}")
+    return df, dt
+
+
+def snapshot_path(release=RELEASE, snapshot_dir=SNAPSHOT_DIR):
+    return Path(snapshot_dir) / release
+
+
+def read_meta(target):
+    with open(Path(target) / "meta.json") as fh:
+        return json.load(fh)
+
+
+def write_meta(target, meta):
+    # replaced atomically, readers see either the old or the new label set
+    tmp = Path(target) / "meta.json.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, Path(target) / "meta.json")
+
+
+def write_snapshot(df, dt, release=RELEASE, snapshot_dir=SNAPSHOT_DIR):
+    """Write both frames as month-major float64 matrices plus a json label file."""
+    country_dimension(df[LABEL_COLUMN])  # an unknown country label fails here, before anything is written
+    target = snapshot_path(release, snapshot_dir)
+    target.mkdir(parents=True, exist_ok=True)
+
+    meta = {"release": release, "releases": [release]}
+    for name, frame in (("countries", df), ("regions", dt)):
+        months = [col for col in frame.columns if col != LABEL_COLUMN]
+        values = np.ascontiguousarray(frame[months].to_numpy(dtype=np.float64).T)
+        np.save(target / f"{name}.npy", values)
+        meta[name] = {"labels": frame[LABEL_COLUMN].tolist(), "months": months}
+
+    # meta.json is written last so a half written snapshot is never picked up
+    write_meta(target, meta)
+    return target
+
+
+def _frame_from_matrix(values, labels, months):
+    import pandas as pd
+
+    # pandas keeps a (columns, rows) block, so the month-major matrix stays a view on the memory map
+    frame = pd.DataFrame(values.T, columns=months, copy=False)
+    frame.insert(0, LABEL_COLUMN, labels)
+    return frame
+
+
+def load_snapshot(release=RELEASE, snapshot_dir=SNAPSHOT_DIR, mmap=True):
+    source = snapshot_path(release, snapshot_dir)
+    meta = read_meta(source)
+
+    mode = "r" if mmap else None
+    frames = []
+    for name in ("countries", "regions"):
+        months = meta[name]["months"]
+        # rows past len(months) belong to an ingest that has not committed meta.json yet
+        values = np.load(source / f"{name}.npy", mmap_mode=mode)[:len(months)]
+        frames.append(_frame_from_matrix(values, meta[name]["labels"], months))
+    return tuple(frames)
+
+
+def has_snapshot(release=RELEASE, snapshot_dir=SNAPSHOT_DIR):
+    return (snapshot_path(release, snapshot_dir) / "meta.json").exists()
+
+
+def load_frames(release=RELEASE, data_dir=DATA_DIR, snapshot_dir=SNAPSHOT_DIR):
+    """Return (df, dt) from the snapshot when present, otherwise from the local CSVs.
+
+    Never touches the network; set REMITTANCE_SOURCE=url to get the old
+    GitHub behaviour back.
+    """
+    source = os.environ.get("REMITTANCE_SOURCE", "local")
+    if source == "url":
+        return load_url(release)
+    if has_snapshot(release, snapshot_dir):
+        return load_snapshot(release, snapshot_dir)
+    return load_csv(release, data_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the memory-mapped snapshot from the processed CSVs")
+    parser.add_argument("--release", default=RELEASE, help="CBK release to convert, e.g. feb26")
+    parser.add_argument("--data-dir", default=DATA_DIR, type=Path)
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, type=Path)
+    args = parser.parse_args(argv)
+
+    df, dt = load_csv(args.release, args.data_dir)
+    target = write_snapshot(df, dt, args.release, args.snapshot_dir)
+    print(f"snapshot for {args.release} written to {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Read-only dataset handed to every figure builder.
+
+The builders used to read and write the module level ``df``/``dt``/``df_melted``
+frames, which is a data race as soon as the app serves requests from more
+than one thread. A ``RemittanceDataset`` is built once, holds frozen NumPy
+arrays plus a month index, and is never modified afterwards, so any number of
+threads can share it without locking.
+
+The country values are served as reported, so they still add up to the
+region totals beside them; ``imputation`` (see imputation.py) holds the
+series with their reporting gaps filled, the mask of filled cells and the
+anomaly flags, for the charts that mark them.
+
+Month labels ("Jan_20") are parsed once into integer years and month numbers,
+and the values are also kept month-major (one contiguous row of countries per
+month), so selecting a month or a calendar year is a zero-copy slice instead
+of a scan over a melted long table.
+"""
+import hashlib
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+
+from aggregates import AggregateCube, build_cube, freeze, update_cube
+from countries import CountryDimension, country_dimension
+from data_store import LABEL_COLUMN, load_frames
+from imputation import Imputation, impute
+
+MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_MONTH_NUMBERS = {name: number for number, name in enumerate(MONTH_NAMES, start=1)}
+
+
+@dataclass(frozen=True)
+class RemittanceDataset:
+    months: tuple
+    month_index: MappingProxyType   # month label -> column position
+    countries: tuple
+    regions: tuple
+    country_values: np.ndarray      # (countries, months), read-only
+    region_values: np.ndarray       # (regions, months), read-only
+    cube: AggregateCube
+    version: str                    # content hash, changes whenever any label or value changes
+    years: np.ndarray               # (months,) e.g. 2023
+    month_numbers: np.ndarray       # (months,) 1..12
+    long_values: np.ndarray         # (months, countries), month-major copy of country_values
+    year_bounds: MappingProxyType   # year -> (start, stop) month positions
+    dimension: CountryDimension     # display name, ISO-3 code and region per country row
+    imputation: Imputation          # country_values with the gaps filled, the mask of filled cells, anomaly flags
+
+    def position(self, month):
+        return self.month_index[month]
+
+    def month_span(self, month):
+        i = self.month_index[month]
+        return slice(i, i + 1)
+
+    def year_span(self, year):
+        return slice(*self.year_bounds.get(year, (0, 0)))
+
+    def month_rows(self, month):
+        # contiguous row of the long table, no copy
+        return self.long_values[self.month_index[month]]
+
+    def long_frame(self, span):
+        """Long format (country, month, value) rows for a run of months, for Plotly Express."""
+        import pandas as pd
+
+        block = self.long_values[span]
+        return pd.DataFrame({
+            LABEL_COLUMN: np.tile(np.asarray(self.countries, dtype=object), len(block)),
+            "Month_Year": np.repeat(self.months[span], len(self.countries)),
+            "Value": block.ravel(),
+        })
+
+    def latest_month(self):
+        return self.months[-1]
+
+    def month_values(self, month):
+        # column view, no copy
+        return self.country_values[:, self.month_index[month]]
+
+
+def parse_months(months):
+    """Split "Jan_20" style labels into integer (years, month numbers) arrays."""
+    years = np.empty(len(months), dtype=np.int64)
+    numbers = np.empty(len(months), dtype=np.int64)
+    for i, month in enumerate(months):
+        name, suffix = month.split("_")
+        years[i] = int(suffix) + 2000
+        numbers[i] = _MONTH_NUMBERS[name[:3].title()]
+    return years, numbers
+
+
+def year_bounds(years):
+    # the columns are chronological, so each calendar year is one contiguous run
+    if (np.diff(years) < 0).any():
+        raise ValueError("month columns are not in chronological order")
+    distinct, starts = np.unique(years, return_index=True)
+    stops = np.append(starts[1:], len(years))
+    return MappingProxyType({int(y): (int(a), int(b)) for y, a, b in zip(distinct, starts, stops)})
+
+
+def _labels_and_values(frame, months):
+    labels = tuple(frame[LABEL_COLUMN].tolist())
+    return labels, freeze(frame[list(months)].to_numpy(dtype=np.float64))
+
+
+def content_version(months, countries, regions, country_values, region_values):
+    digest = hashlib.sha1()
+    digest.update(repr((months, countries, regions)).encode())
+    digest.update(np.ascontiguousarray(country_values).tobytes())
+    digest.update(np.ascontiguousarray(region_values).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _country_values(df, months):
+    # reported values, and their gaps filled in one vectorized pass over the matrix
+    countries, reported = _labels_and_values(df, months)
+    filled = impute(reported, countries)
+    filled = Imputation(freeze(filled.values), freeze(filled.mask), filled.strategies,
+                        freeze(filled.anomalies), freeze(filled.scores))
+    return countries, reported, filled
+
+
+def _assemble(months, countries, regions, country_values, region_values, cube, imputation, strict=True):
+    years, month_numbers = parse_months(months)
+    return RemittanceDataset(
+        months=months,
+        month_index=MappingProxyType({month: i for i, month in enumerate(months)}),
+        countries=countries,
+        regions=regions,
+        country_values=country_values,
+        region_values=region_values,
+        cube=cube,
+        version=content_version(months, countries, regions, country_values, region_values),
+        years=freeze(years),
+        month_numbers=freeze(month_numbers),
+        long_values=freeze(country_values.T),
+        year_bounds=year_bounds(years),
+        # an unknown label raises UnknownCountry, only synthetic frames (benchmarks) pass strict=False
+        dimension=country_dimension(countries, strict),
+        imputation=imputation,
+    )
+
+
+def from_frames(df, dt, strict=True):
+    """Dataset for a country and a region frame; ``strict=False`` keeps labels missing from countries.COUNTRIES."""
+    months = tuple(col for col in dt.columns if col != LABEL_COLUMN)
+    countries, country_values, imputation = _country_values(df, months)
+    regions, region_values = _labels_and_values(dt, months)
+    cube = build_cube(months, countries, country_values, region_values)
+    return _assemble(months, countries, regions, country_values, region_values, cube, imputation, strict)
+
+
+def changed_positions(old, new):
+    """Positions of months in ``old`` whose values differ in ``new`` (same shape prefix)."""
+    n = old.shape[1]
+    same = np.isclose(old, new[:, :n], rtol=0, atol=1e-9, equal_nan=True).all(axis=0)
+    return np.flatnonzero(~same).tolist()
+
+
+def refresh(data, df, dt):
+    """Dataset for updated frames, recomputing aggregates only for months that changed.
+
+    Falls back to a full build when countries, regions or existing months differ.
+    """
+    months = tuple(col for col in dt.columns if col != LABEL_COLUMN)
+    countries, country_values, imputation = _country_values(df, months)
+    regions, region_values = _labels_and_values(dt, months)
+    if (countries, regions) != (data.countries, data.regions) or months[:len(data.months)] != data.months:
+        return from_frames(df, dt)
+
+    changed = sorted(set(changed_positions(data.country_values, country_values))
+                     | set(changed_positions(data.region_values, region_values)))
+    cube = update_cube(data.cube, months, countries, country_values, region_values, changed)
+    return _assemble(months, countries, regions, country_values, region_values, cube, imputation)
+
+
+def load_dataset(**kwargs):
+    # same arguments as data_store.load_frames
+    return from_frames(*load_frames(**kwargs))
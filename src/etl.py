@@ -0,0 +1,173 @@
+"""Streaming Excel -> columnar ETL for the CBK "Remittances by source" workbooks.
+
+Replaces the wrangle_countries / wrangle_regions notebooks. The workbook is
+opened read-only and walked once with a row iterator (no full DOM, no pandas
+copy per cleaning step):
+
+* row 2 holds the years (only above the first month of each year) and row 3
+  the month names, together they give the "Jan_20" style labels;
+* months before ``START`` (Jan 2020, the 2019 columns start in February) are
+  dropped;
+* indented country rows go to the country table and "Total <region>" rows to
+  the region table, "Other" rows and the economic blocs are left out;
+* reading stops at GRAND TOTAL.
+
+Both tables are written straight into the snapshot (see data_store/ingest),
+and optionally as the processed CSV pair.
+
+    python src/etl.py                          # every workbook in data/raw
+    python src/etl.py data/raw/Feb2026.xlsx --into feb26 --csv-dir data/processed
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from data_store import LABEL_COLUMN, REPO_ROOT, SNAPSHOT_DIR, write_snapshot
+from dataset import MONTH_NAMES
+from ingest import IncompatibleRelease, ingest
+
+RAW_DIR = REPO_ROOT / "data" / "raw"
+START = (2020, 1)
+
+SKIPPED_ROWS = {"Other", "Other Countries NES"}
+END_ROW = "GRAND TOTAL"
+
+
+class UnsupportedWorkbook(ValueError):
+    """Not a "Remittances by source" sheet (e.g. the Diaspora Remittances summary)."""
+
+
+def raw_workbooks(raw_dir=RAW_DIR):
+    # "~$name.xlsx" files are Excel lock files, not workbooks
+    return sorted(path for path in Path(raw_dir).glob("*.xlsx") if not path.name.startswith("~$"))
+
+
+def _month_columns(year_row, month_row, start=START):
+    """(column index, label) for every month column at or after ``start``."""
+    columns, year = [], None
+    for col, name in enumerate(month_row):
+        if year_row[col] not in (None, ""):
+            year = int(str(year_row[col]).strip())
+        if col < 2 or name in (None, ""):
+            continue
+        month = MONTH_NAMES.index(str(name).strip()[:3].title()) + 1
+        if (year, month) >= start:
+            columns.append((col, f"{MONTH_NAMES[month - 1]}_{year % 100:02d}"))
+    return columns
+
+
+def _number(cell):
+    if cell is None or cell == "":
+        return np.nan
+    if isinstance(cell, str):
+        return float(cell.replace(",", ""))
+    return float(cell)
+
+
+def read_workbook(path, start=START):
+    """Return (df, dt, stats) for one workbook in a single streaming pass."""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        next(rows)  # title
+        year_row, month_row = next(rows), next(rows)
+        if len(month_row) < 3 or str(month_row[1]).strip() != LABEL_COLUMN:
+            raise UnsupportedWorkbook(f"{Path(path).name}: no '{LABEL_COLUMN}' header row")
+
+        columns = _month_columns(year_row, month_row, start)
+        positions = [col for col, _ in columns]
+        countries, regions = ([], []), ([], [])
+        n_rows = 3
+        for row in rows:
+            n_rows += 1
+            label = row[1] if len(row) > 1 else None
+            if not isinstance(label, str):
+                continue
+            name = label.strip()
+            if name == END_ROW:
+                break
+            if name.startswith("Total "):
+                target, label = regions, label.replace("Total ", "")
+            elif label.startswith(" ") and name not in SKIPPED_ROWS:
+                target = countries
+            else:
+                continue  # region headings and "Other" rows
+            target[0].append(label)
+            target[1].append([_number(row[col]) for col in positions])
+    finally:
+        workbook.close()
+
+    months = [label for _, label in columns]
+    frames = []
+    for labels, values in (countries, regions):
+        frame = pd.DataFrame(np.array(values, dtype=np.float64).reshape(len(labels), len(months)), columns=months)
+        frame.insert(0, LABEL_COLUMN, labels)
+        frames.append(frame)
+    return frames[0], frames[1], {"rows": n_rows, "cells": n_rows * len(month_row)}
+
+
+def release_name(months):
+    # last month "Feb_26" -> "feb26", the naming of data/processed
+    return months[-1].replace("_", "").lower()
+
+
+def run(path, start=START, into=None, snapshot_dir=SNAPSHOT_DIR, csv_dir=None):
+    tracemalloc.start()
+    began = time.perf_counter()
+    try:
+        df, dt, stats = read_workbook(path, start)
+        release = release_name(df.columns)
+        if into:
+            ingest(df, dt, release, into, snapshot_dir)
+        else:
+            write_snapshot(df, dt, release, snapshot_dir)
+        if csv_dir:
+            Path(csv_dir).mkdir(parents=True, exist_ok=True)
+            df.to_csv(Path(csv_dir) / f"{release}.csv", index=False)
+            dt.to_csv(Path(csv_dir) / f"region_{release}.csv", index=False)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    elapsed = time.perf_counter() - began
+    return {
+        "file": Path(path).name,
+        "release": release,
+        "countries": len(df),
+        "regions": len(dt),
+        "months": len(df.columns) - 1,
+        "seconds": elapsed,
+        "rows_per_s": stats["rows"] / elapsed,
+        "mb_per_s": Path(path).stat().st_size / elapsed / 1e6,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Excel workbook(s) -> snapshot (and optional CSV)")
+    parser.add_argument("files", nargs="*", type=Path, help="workbooks, default: every .xlsx in data/raw")
+    parser.add_argument("--into", help="ingest into this snapshot instead of one snapshot per release")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, type=Path)
+    parser.add_argument("--csv-dir", type=Path, help="also write <release>.csv / region_<release>.csv here")
+    args = parser.parse_args(argv)
+
+    for path in args.files or raw_workbooks():
+        try:
+            report = run(path, into=args.into, snapshot_dir=args.snapshot_dir, csv_dir=args.csv_dir)
+        except UnsupportedWorkbook as exc:
+            print(f"skipped {exc}")
+            continue
+        except IncompatibleRelease as exc:  # --into only, the rest of the batch still goes in
+            print(f"skipped {path}: {exc}")
+            continue
+        print(f"{report['file']:<48} -> {report['release']:<6} {report['countries']} countries, "
+              f"{report['regions']} regions, {report['months']} months in {report['seconds']:.2f}s "
+              f"({report['rows_per_s']:,.0f} rows/s, {report['mb_per_s']:.1f} MB/s, peak {report['peak_mb']:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
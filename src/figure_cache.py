@@ -0,0 +1,115 @@
+"""Bounded LRU cache of serialized figures.
+
+Building the Plotly Express figures (two sunbursts and a choropleth) and
+encoding them to JSON is most of the CPU time of a dashboard request, while
+the set of months is small and fixed. Entries are keyed by
+(builder name, month, dataset version, builder options) and hold the already
+encoded JSON, so a repeat selection skips both steps: ``get`` lets the
+server answer a repeat callback with those bytes before Dash decodes or
+re-encodes anything (app.cached_panel_response). Entries of at most ``versions`` datasets
+are kept (the live one plus the vintages being browsed); when another version
+shows up every entry of the least recently used one is dropped.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from lean_figures import LEAN_FIGURES, lean
+from timing import timed
+
+FIGURE_CACHE_SIZE = int(os.environ.get("REMITTANCE_FIGURE_CACHE_SIZE", 1024))
+
+
+def to_json(fig, lean_figures=LEAN_FIGURES):
+    if lean_figures:
+        return pio.to_json(lean(fig.to_plotly_json()), validate=False)
+    return pio.to_json(fig, validate=False)
+
+
+def serialize(figures, lean_figures=LEAN_FIGURES):
+    # builders return either one figure or a tuple of figures
+    if isinstance(figures, tuple):
+        return tuple(to_json(fig, lean_figures) for fig in figures)
+    return to_json(figures, lean_figures)
+
+
+class FigureCache:
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE, versions=1):
+        self.maxsize = maxsize
+        self.max_versions = versions
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._versions = OrderedDict()  # version -> None, least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name, data, month, options=()):
+        """Serialized figure(s) when cached, else None; a miss is counted by get_or_build."""
+        key = (name, month, data.version, options)
+        with self._lock:
+            self._use_version(data.version)
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_or_build(self, name, data, month, build, options=()):
+        """Return the serialized figure(s) for ``name``/``month``, calling ``build()`` on a miss.
+
+        ``options`` are the builder's extra arguments (the trend chart's N and
+        window), part of the key but not of the timing name.
+        """
+        key = (name, month, data.version, options)
+        with self._lock:
+            self._use_version(data.version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # build outside the lock, two threads racing on the same key just do the work twice
+        with timed(name, "figure"):
+            figures = build()
+        with timed(name, "serialize"):
+            payload = serialize(figures)
+        if self.maxsize <= 0:
+            return payload
+
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return payload
+
+    def _use_version(self, version):
+        if version in self._versions:
+            self._versions.move_to_end(version)
+            return
+        self._versions[version] = None
+        while len(self._versions) > self.max_versions:
+            stale, _ = self._versions.popitem(last=False)
+            for key in [key for key in self._entries if key[2] == stale]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,233 @@
+"""Batched seasonal forecasts for every country, region and the total.
+
+All series are forecast together as rows of one matrix: the recursions step
+through the months once and update every series (and every candidate set of
+smoothing parameters) with array operations, so 10,000 series cost about as
+many Python steps as one. Two models:
+
+* seasonal naive: each month of the horizon repeats the same month of the
+  last year;
+* Holt-Winters, additive season with a damped trend. The smoothing
+  parameters are picked per series from ``GRID`` by one-step-ahead squared
+  error over the whole history, all candidates in the same pass.
+
+Forecasts are made from every month with two years of history behind it
+(``Forecasts.origins``), so picking an earlier month in the dashboard shows
+what the models would have projected against what came in. The parameter
+choice uses the full history, so those backtests are slightly optimistic.
+
+Computed once per dataset version, written next to the snapshot as
+``<FORECAST_DIR>/<version>.npz`` and read back by the next worker or deploy:
+
+    python src/forecast.py            # the current dataset, prints the fit
+"""
+import argparse
+import itertools
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from data_store import SNAPSHOT_DIR
+
+FORECAST_DIR = Path(os.environ.get("REMITTANCE_FORECAST_DIR", SNAPSHOT_DIR / "forecasts"))
+SEASON = 12
+HORIZON = 12
+HORIZON_CHOICES = (3, 6, 12)
+DAMPING = 0.98
+# (alpha, beta, gamma): level, trend and season smoothing
+GRID = tuple(itertools.product((0.2, 0.5, 0.8), (0.05, 0.2), (0.1, 0.3)))
+BAND_Z = 1.2816  # 80% interval
+TOTAL = "Total"
+
+
+@dataclass(frozen=True)
+class Forecasts:
+    version: str
+    labels: tuple                 # series: TOTAL, the regions, then the countries
+    origins: np.ndarray           # (origins,) month positions forecast from
+    seasonal_naive: np.ndarray    # (origins, series, HORIZON)
+    holt_winters: np.ndarray      # (origins, series, HORIZON)
+    sigma: np.ndarray             # (series,) one-step residual sd of the chosen Holt-Winters fit
+    params: np.ndarray            # (series, 3) chosen alpha, beta, gamma
+
+    def origin(self, position):
+        """Row of ``position`` in the forecast arrays, None when it has too little history."""
+        row = position - int(self.origins[0]) if len(self.origins) else -1
+        return row if 0 <= row < len(self.origins) else None
+
+    def band(self, series, horizon=HORIZON):
+        # +-BAND_Z sd, the one-step sd growing with the square root of the horizon
+        return BAND_Z * self.sigma[series] * np.sqrt(np.arange(1, horizon + 1))
+
+
+def series_labels(data):
+    return (TOTAL,) + tuple(region.strip() for region in data.regions) + tuple(data.dimension.names)
+
+
+def series_matrix(data):
+    """(labels, (series, months) values): the total, the regions and the countries of ``data``.
+
+    The countries are fitted with their reporting gaps filled (imputation.py).
+    """
+    labels = series_labels(data)
+    values = np.vstack([data.cube.region_totals[None, :], data.region_values, data.imputation.values])
+    return labels, values
+
+
+def series_values(data, k):
+    """Row ``k`` of series_matrix, read in place instead of stacking the whole matrix."""
+    if k == 0:
+        return data.cube.region_totals
+    if k <= len(data.regions):
+        return data.region_values[k - 1]
+    return data.country_values[k - 1 - len(data.regions)]
+
+
+def fill_gaps(values):
+    # last observation carried forward, a leading gap takes the first observation, an empty series is 0
+    values = np.asarray(values, dtype=float)
+    observed = ~np.isnan(values)
+    index = np.maximum.accumulate(np.where(observed, np.arange(values.shape[1]), 0), axis=1)
+    filled = np.take_along_axis(values, index, axis=1)
+    first = np.take_along_axis(values, observed.argmax(axis=1)[:, None], axis=1)
+    return np.nan_to_num(np.where(np.isnan(filled), first, filled))
+
+
+def seasonal_naive(values, origins, horizon=HORIZON, season=SEASON):
+    """(origins, series, horizon): step k from origin o repeats month o - season + k (mod season)."""
+    steps = (np.arange(horizon) % season) - season + 1
+    return np.transpose(values[:, np.asarray(origins)[:, None] + steps[None, :]], (1, 0, 2))
+
+
+def _initial_state(values, season):
+    first, second = values[:, :season].mean(axis=1), values[:, season:2 * season].mean(axis=1)
+    return first, (second - first) / season, values[:, :season] - first[:, None]
+
+
+def _errors(values, alpha, beta, gamma, season, damping):
+    # sum of squared one-step errors per (candidate, series), every candidate in one pass
+    level, trend, seasonal = _initial_state(values, season)
+    shape = alpha.shape[:1] + level.shape
+    level, trend = np.broadcast_to(level, shape).copy(), np.broadcast_to(trend, shape).copy()
+    seasonal = np.broadcast_to(seasonal, shape + (season,)).copy()
+    sse = np.zeros(shape)
+    for t in range(season, values.shape[1]):
+        y, slot = values[:, t], t % season
+        s = seasonal[..., slot]
+        sse += (y - (level + damping * trend + s)) ** 2
+        new_level = alpha * (y - s) + (1 - alpha) * (level + damping * trend)
+        trend = beta * (new_level - level) + (1 - beta) * damping * trend
+        seasonal[..., slot] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+    return sse
+
+
+def holt_winters(values, origins, horizon=HORIZON, season=SEASON, damping=DAMPING, grid=GRID):
+    """(forecasts (origins, series, horizon), sigma (series,), params (series, 3)).
+
+    ``values`` must be gap free (fill_gaps) and hold at least two seasons.
+    """
+    candidates = np.asarray(grid, dtype=float)
+    sse = _errors(values, *(candidates[:, [k]] for k in range(3)), season, damping)
+    best = sse.argmin(axis=0)
+    params = candidates[best]
+    alpha, beta, gamma = params[:, 0], params[:, 1], params[:, 2]
+    sigma = np.sqrt(sse[best, np.arange(len(best))] / max(values.shape[1] - season, 1))
+
+    # second pass with each series' own parameters, emitting the forecast at every origin
+    rows = {int(o): k for k, o in enumerate(origins)}
+    out = np.empty((len(rows), len(values), horizon))
+    damped = np.cumsum(damping ** np.arange(1, horizon + 1))
+    level, trend, seasonal = _initial_state(values, season)
+    for t in range(season, values.shape[1]):
+        y, slot = values[:, t], t % season
+        s = seasonal[:, slot]
+        new_level = alpha * (y - s) + (1 - alpha) * (level + damping * trend)
+        trend = beta * (new_level - level) + (1 - beta) * damping * trend
+        seasonal[:, slot] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+        if t in rows:
+            slots = (t + 1 + np.arange(horizon)) % season
+            out[rows[t]] = level[:, None] + damped[None, :] * trend[:, None] + seasonal[:, slots]
+    return np.clip(out, 0, None), sigma, params
+
+
+def compute(version, labels, values, horizon=HORIZON, season=SEASON):
+    values = fill_gaps(values)
+    origins = np.arange(2 * season - 1, values.shape[1])
+    if len(origins) == 0:
+        empty = np.empty((0, len(values), horizon))
+        return Forecasts(version, tuple(labels), origins, empty, empty, np.zeros(len(values)),
+                         np.zeros((len(values), 3)))
+    predicted, sigma, params = holt_winters(values, origins, horizon, season)
+    return Forecasts(version, tuple(labels), origins, seasonal_naive(values, origins, horizon, season),
+                     predicted, sigma, params)
+
+
+def forecast_path(version, forecast_dir=FORECAST_DIR):
+    return Path(forecast_dir) / f"{version}.npz"
+
+
+def save(forecasts, forecast_dir=FORECAST_DIR):
+    target = forecast_path(forecasts.version, forecast_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".tmp.npz")
+    np.savez(tmp, labels=np.asarray(forecasts.labels, dtype=str), origins=forecasts.origins,
+             seasonal_naive=forecasts.seasonal_naive, holt_winters=forecasts.holt_winters,
+             sigma=forecasts.sigma, params=forecasts.params)
+    os.replace(tmp, target)  # another worker never reads a half written file
+    return target
+
+
+def load(version, forecast_dir=FORECAST_DIR):
+    try:
+        with np.load(forecast_path(version, forecast_dir)) as stored:
+            return Forecasts(version, tuple(stored["labels"].tolist()), stored["origins"], stored["seasonal_naive"],
+                             stored["holt_winters"], stored["sigma"], stored["params"])
+    except FileNotFoundError:
+        return None
+
+
+def forecasts_for(data, forecast_dir=FORECAST_DIR):
+    """Stored forecasts of ``data``'s version, computed and stored on the first call."""
+    forecasts = load(data.version, forecast_dir)
+    if forecasts is not None and forecasts.labels == series_labels(data):
+        return forecasts
+    forecasts = compute(data.version, *series_matrix(data))
+    try:
+        save(forecasts, forecast_dir)
+    except OSError:  # read-only deploy, recomputed per process then
+        pass
+    return forecasts
+
+
+def future_months(month, n):
+    """The ``n`` month labels after ``month`` ("Feb_26" -> "Mar_26", ...)."""
+    from dataset import MONTH_NAMES
+
+    name, year = month.split("_")
+    start = (int(year) * 12 + MONTH_NAMES.index(name[:3].title())) + 1
+    return tuple(f"{MONTH_NAMES[k % 12]}_{k // 12:02d}" for k in range(start, start + n))
+
+
+def main(argv=None):
+    from dataset import load_dataset
+
+    parser = argparse.ArgumentParser(description="Forecast every series of the current dataset and store it")
+    parser.add_argument("--out", default=FORECAST_DIR, type=Path)
+    args = parser.parse_args(argv)
+
+    data = load_dataset()
+    forecasts = compute(data.version, *series_matrix(data))
+    target = save(forecasts, args.out)
+    last = len(forecasts.origins) - 1
+    print(f"{len(forecasts.labels)} series from {len(forecasts.origins)} origins -> {target}")
+    for k, label in enumerate(forecasts.labels[:7]):
+        print(f"  {label:<24} next {HORIZON} months {forecasts.holt_winters[last, k].sum():>14,.0f}"
+              f"  (seasonal naive {forecasts.seasonal_naive[last, k].sum():,.0f}), params {forecasts.params[k]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""gunicorn settings for the dashboard (see wsgi.py).
+
+    gunicorn -c src/gunicorn.conf.py wsgi:application
+
+REMITTANCE_WORKERS and REMITTANCE_THREADS size the server, PORT is set by
+Render. REMITTANCE_PRELOAD=0 loads the app in every worker instead of once in
+the master.
+"""
+import os
+from pathlib import Path
+
+chdir = str(Path(__file__).resolve().parent)
+bind = f"0.0.0.0:{os.environ.get('PORT', 8050)}"
+workers = int(os.environ.get("REMITTANCE_WORKERS", 2))
+threads = int(os.environ.get("REMITTANCE_THREADS", 4))
+worker_class = "gthread"
+preload_app = os.environ.get("REMITTANCE_PRELOAD", "1") != "0"
+timeout = 60
+graceful_timeout = 20
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    # threads do not survive the fork, each worker polls for new snapshots itself
+    import app
+
+    app.start_dataset_watcher()
@@ -0,0 +1,114 @@
+"""HTTP caching for the dashboard payloads.
+
+Compression itself is done by flask-compress (``Dash(compress=True)``, gzip
+and brotli). This module adds validators and a cacheable route:
+
+* every ``/_dash-update-component`` response for a panel callback gets a
+  strong ETag derived from (callback, inputs, dataset version), computed from
+  the request body before the callback runs, so a request carrying a matching
+  ``If-None-Match`` is answered with 304 without building anything, and one
+  whose figures are already cached is answered with the stored JSON before
+  Dash decodes the request or encodes a response;
+* ``/payload/<version>/<month>/<panel>`` serves a panel's figure JSON with an
+  immutable ``Cache-Control`` (the version is in the URL, a new dataset is a
+  new URL), so browsers and a CDN in front of Render can keep it. Pre-rendered
+  payloads are sent in their stored gzip/brotli encoding as they are. The
+  URL segments become a path under the pre-render directory, so a version,
+  month or panel of the wrong shape is a 404 before anything is read.
+
+Browsers never revalidate POST responses, so the 304 path of the callback
+route only helps proxies and scripted clients; the GET route is the one a CDN
+can cache.
+"""
+import gzip
+import hashlib
+import json
+import re
+
+from flask import Response, abort, g, request
+
+CALLBACK_PATH = "/_dash-update-component"
+IMMUTABLE = "public, max-age=31536000, immutable"
+VERSION_PATTERN = re.compile(r"[0-9a-f]{16}")  # dataset.content_version
+MONTH_PATTERN = re.compile(r"[A-Z][a-z]{2}_\d{2}")  # "Feb_26"
+
+
+def _client_etags():
+    # flask-compress appends ":<encoding>" to the ETag it sends back, strip it again
+    return {tag.split(":")[0] for tag in request.if_none_match.as_set()}
+
+
+def callback_etag(body, version):
+    key = json.dumps([body.get("output"), body.get("inputs"), body.get("state"), version], sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def install(server, version_for, payload_for, store, panels, cached_for=None):
+    """``version_for(inputs)`` -> dataset version or None (not cacheable),
+    ``payload_for(version, month, panel)`` -> figure JSON or None (unknown),
+    ``panels`` the panel names the payload route serves,
+    ``cached_for(inputs, outputs)`` -> the callback's response JSON when it is cached, else None."""
+
+    @server.before_request
+    def check_callback_etag():
+        if request.path != CALLBACK_PATH or request.method != "POST":
+            return None
+        body = request.get_json(silent=True) or {}
+        inputs = {f"{item['id']}.{item['property']}": item.get("value")
+                  for item in body.get("inputs", []) if isinstance(item, dict) and "id" in item}
+        version = version_for(inputs)
+        if version is None:
+            return None
+        g.callback_etag = callback_etag(body, version)
+        if g.callback_etag in _client_etags():
+            response = Response(status=304)
+            response.set_etag(g.callback_etag)
+            return response
+        cached = cached_for(inputs, body.get("outputs")) if cached_for is not None else None
+        if cached is not None:
+            return Response(cached, mimetype="application/json")  # compressed and tagged on the way out
+        return None
+
+    @server.after_request
+    def add_callback_etag(response):
+        etag = g.pop("callback_etag", None)
+        if etag and response.status_code == 200:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"  # keep it, but revalidate
+        return response
+
+    @server.route("/payload/<version>/<month>/<panel>")
+    def payload(version, month, panel):
+        if panel not in panels or not VERSION_PATTERN.fullmatch(version) or not MONTH_PATTERN.fullmatch(month):
+            abort(404)
+        etag = f"{version}.{month}.{panel}"
+        if etag in _client_etags():
+            response = Response(status=304)
+        else:
+            response = _stored_payload(store, version, month, panel)
+            if response is None:
+                body = payload_for(version, month, panel)
+                if body is None:
+                    abort(404)
+                response = Response(body, mimetype="application/json")  # compressed on the way out
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+
+def _stored_payload(store, version, month, panel):
+    """Pre-rendered payload in the best encoding the client accepts, sent without recompressing."""
+    accepted = request.accept_encodings
+    for encoding in ("br", "gzip"):
+        if not accepted[encoding]:
+            continue
+        raw = store.read_bytes(version, month, panel, encoding)
+        if raw is not None:
+            response = Response(raw, mimetype="application/json")
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+    raw = store.read_bytes(version, month, panel)
+    if raw is None:
+        return None
+    return Response(gzip.decompress(raw), mimetype="application/json")
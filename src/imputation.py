@@ -0,0 +1,195 @@
+"""Gap filling and anomaly flags over the whole country x month matrix.
+
+Some CBK sheets report a corridor with no data for a month as 0. Those
+cells used to be fixed by hand in the wrangle notebooks (the footer listed
+them), and the fixes never reached the processed CSVs. ``impute`` now runs
+when a dataset is built (dataset.from_frames): a NaN cell counts as missing,
+and so does a 0 in the series ``ZERO_IS_MISSING`` names (elsewhere a 0 is a
+real month without remittances). Every strategy fills every missing cell of
+the matrix with array operations, and each series keeps the fills of its
+own strategy:
+
+* ``locf``: last observation carried forward;
+* ``nocb``: next observation carried backward;
+* ``nearest``: whichever of the two is closer in time (the earlier on a
+  tie), so a run of gaps is split between them;
+* ``rolling_mean``: mean of the observed months within ``ROLLING_HALF_WINDOW``
+  months either side;
+* ``seasonal``: mean of the same month a year before and a year after.
+
+A strategy that has nothing to work with (a gap at the edge, no observed
+neighbour) falls back to the next one: seasonal, rolling mean, nearest.
+``STRATEGIES`` reproduces the notebook fixes; other series use
+``DEFAULT_STRATEGY``. Snapshots and the dataset's ``country_values`` keep
+the reported values, so the country breakdown still adds up to the region
+totals; the filled values are only shown where the dashboard marks them.
+
+Anomalies are flagged on the filled series with a robust z-score of the
+month-over-month log change, ``0.6745 * (d - median) / MAD`` per series
+(Iglewicz and Hoaglin), beyond ``ANOMALY_THRESHOLD``.
+"""
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from countries import normalize
+
+DEFAULT_STRATEGY = "seasonal"
+STRATEGY_NAMES = ("locf", "nocb", "nearest", "rolling_mean", "seasonal")
+# normalized label -> strategy, the hand-applied fixes of the wrangle notebooks
+STRATEGIES = {
+    "bahamas": "nocb",
+    "iraq": "nearest",
+    "china": "rolling_mean",
+}
+# normalized label -> whether a 0 in that series is a reporting gap, the series of the notebook fixes
+ZERO_IS_MISSING = {
+    "bahamas": True,
+    "iraq": True,
+    "china": True,
+}
+ZERO_IS_MISSING_DEFAULT = False
+# strategy -> how the footer describes it
+STRATEGY_LABELS = {
+    "locf": "Used LOCF (Last Observation Carried Forward)",
+    "nocb": "Used NOCB (Next Observation Carried Backward)",
+    "nearest": "Used the nearest observation (LOCF before the middle of the gap, NOCB after)",
+    "rolling_mean": "Replaced with mean from six-month window",
+    "seasonal": "Replaced with mean of the same month a year before and after",
+}
+ROLLING_HALF_WINDOW = 3  # six months around the gap
+SEASON = 12
+ANOMALY_THRESHOLD = 3.5
+
+
+@dataclass(frozen=True)
+class Imputation:
+    values: np.ndarray      # (series, months) filled
+    mask: np.ndarray        # (series, months) True where a value was filled in
+    strategies: tuple       # strategy per series
+    anomalies: np.ndarray   # (series, months) True where the robust z-score is beyond the threshold
+    scores: np.ndarray      # (series, months) robust z-score, NaN for the first month
+
+    def filled(self):
+        """(row, position, strategy) of every filled cell."""
+        rows, positions = np.nonzero(self.mask)
+        return [(int(r), int(p), self.strategies[r]) for r, p in zip(rows, positions)]
+
+
+def notes(imputation, names, months):
+    """One line per filled cell for the footer: "Bahamas (Apr 2020): Used NOCB (...)"."""
+    lines = []
+    for row, position, strategy in imputation.filled():
+        name, year = months[position].split("_")
+        lines.append(f"{names[row]} ({name} 20{year}): {STRATEGY_LABELS[strategy]}")
+    return lines
+
+
+def missing_cells(values, zero_is_missing):
+    """NaN cells, and the 0 cells of the series (rows) ``zero_is_missing`` flags."""
+    return np.isnan(values) | ((values == 0) & np.asarray(zero_is_missing, dtype=bool)[:, None])
+
+
+def _take(values, rows, positions):
+    valid = (positions >= 0) & (positions < values.shape[1])
+    return np.where(valid, values[rows, np.clip(positions, 0, values.shape[1] - 1)], np.nan)
+
+
+def candidates(values, observed, rows, cols, half_window=ROLLING_HALF_WINDOW, season=SEASON):
+    """strategy -> fill of the cells (``rows``, ``cols``), NaN where the strategy has nothing.
+
+    The running positions and sums cover the whole matrix in a few array
+    passes; only the missing cells are then read from them.
+    """
+    n = values.shape[1]
+    positions = np.arange(n)
+    before = np.maximum.accumulate(np.where(observed, positions, -1), axis=1)[rows, cols]
+    after = np.minimum.accumulate(np.where(observed, positions, n)[:, ::-1], axis=1)[:, ::-1][rows, cols]
+    locf, nocb = _take(values, rows, before), _take(values, rows, after)
+    nearest = np.where(np.isnan(locf) | (((after - cols) < (cols - before)) & ~np.isnan(nocb)), nocb, locf)
+
+    # observed values and counts as running sums, a window is two reads
+    kept = np.where(observed, values, 0)
+    sums = np.concatenate([np.zeros((len(values), 1)), np.cumsum(kept, axis=1)], axis=1)
+    counts = np.concatenate([np.zeros((len(values), 1)), np.cumsum(observed, axis=1)], axis=1)
+    lo, hi = np.clip(cols - half_window, 0, n), np.clip(cols + half_window + 1, 0, n)
+    count = counts[rows, hi] - counts[rows, lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling = np.where(count > 0, (sums[rows, hi] - sums[rows, lo]) / count, np.nan)
+
+    # the same month a year before and a year after, when observed
+    year = np.stack([cols - season, cols + season])
+    seen = (year >= 0) & (year < n)
+    seen[seen] = observed[np.broadcast_to(rows, year.shape)[seen], year[seen]]
+    around = np.where(seen, values[rows, np.clip(year, 0, n - 1)], 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        seasonal = np.where(seen.any(axis=0), around.sum(axis=0) / seen.sum(axis=0), np.nan)
+
+    return {
+        "locf": np.where(np.isnan(locf), nocb, locf),
+        "nocb": np.where(np.isnan(nocb), locf, nocb),
+        "nearest": nearest,
+        "rolling_mean": np.where(np.isnan(rolling), nearest, rolling),
+        "seasonal": np.where(np.isnan(seasonal), np.where(np.isnan(rolling), nearest, rolling), seasonal),
+    }
+
+
+def _row_median(matrix):
+    # np.median, with the slower nanmedian only for the rows that have a NaN
+    median = np.median(matrix, axis=1, keepdims=True)
+    gaps = np.isnan(median[:, 0])
+    if gaps.any():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # a series without a single positive month
+            median[gaps] = np.nanmedian(matrix[gaps], axis=1, keepdims=True)
+    return median
+
+
+def robust_scores(values):
+    """Robust z-score of each month's log change from the month before, per series."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.diff(np.log(np.where(values > 0, values, np.nan)), axis=1)
+        median = _row_median(change)
+        mad = _row_median(np.abs(change - median))
+        scores = 0.6745 * (change - median) / mad
+    return np.concatenate([np.full((len(values), 1), np.nan), scores], axis=1)
+
+
+def strategies_for(labels, strategies=None, default=DEFAULT_STRATEGY):
+    table = STRATEGIES if strategies is None else strategies
+    chosen = tuple(table.get(normalize(label), default) for label in labels)
+    unknown = set(chosen) - set(STRATEGY_NAMES)
+    if unknown:
+        raise ValueError(f"unknown imputation strategy {', '.join(sorted(unknown))}, expected one of {STRATEGY_NAMES}")
+    return chosen
+
+
+def zero_gaps_for(labels, zero_is_missing=None, default=ZERO_IS_MISSING_DEFAULT):
+    table = ZERO_IS_MISSING if zero_is_missing is None else zero_is_missing
+    return np.array([bool(table.get(normalize(label), default)) for label in labels], dtype=bool)
+
+
+def impute(values, labels, strategies=None, default=DEFAULT_STRATEGY, zero_is_missing=None,
+           threshold=ANOMALY_THRESHOLD):
+    """Fill the gaps of ``values`` (series, months) and flag anomalies, see the module docstring.
+
+    ``strategies`` and ``zero_is_missing`` map normalized labels like
+    ``STRATEGIES`` and ``ZERO_IS_MISSING``, which they replace.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    chosen = strategies_for(labels, strategies, default)
+    mask = missing_cells(values, zero_gaps_for(labels, zero_is_missing))
+    rows, cols = np.nonzero(mask)
+    fills = candidates(values, ~mask, rows, cols)
+    code = np.array([STRATEGY_NAMES.index(name) for name in chosen], dtype=np.intp)
+    fill = np.stack([fills[name] for name in STRATEGY_NAMES])[code[rows], np.arange(len(rows))]
+    # a series with nothing observed keeps its cells as they are
+    found = ~np.isnan(fill)
+    filled = values.copy()
+    filled[rows[found], cols[found]] = fill[found]
+    mask[rows[~found], cols[~found]] = False
+    scores = robust_scores(filled)
+    with np.errstate(invalid="ignore"):
+        anomalies = np.abs(scores) > threshold
+    return Imputation(filled, mask, chosen, anomalies, scores)
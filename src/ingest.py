@@ -0,0 +1,169 @@
+"""Incremental monthly ingest into the snapshot.
+
+A new CBK release adds a month or two at the end and restates a few earlier
+months. Instead of regenerating every file, ``ingest`` compares the release
+with the current snapshot and only
+
+* appends the new months to the end of the month-major .npy files, and
+* overwrites the rows of months whose values were revised,
+
+then commits a new meta.json. The running app picks the change up through
+``dataset.refresh``, which recomputes aggregates only for the affected months.
+
+    python src/ingest.py --release apr26            # data/processed/apr26.csv + region_apr26.csv
+    python src/ingest.py --release apr26 --snapshot feb26
+"""
+import argparse
+import io
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from data_store import (
+    DATA_DIR, LABEL_COLUMN, RELEASE, SNAPSHOT_DIR, has_snapshot, load_csv, read_meta,
+    snapshot_path, write_meta, write_snapshot,
+)
+
+TOLERANCE = 1e-6  # values are thousands of USD, anything below this is float noise
+
+
+class IncompatibleRelease(ValueError):
+    """The release cannot be applied as an append/patch (different rows or reordered months)."""
+
+
+def _read_header(fh):
+    version = np.lib.format.read_magic(fh)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fh)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fh)
+    return version, shape, fortran_order, dtype, fh.tell()
+
+
+def append_rows(path, rows):
+    """Append month rows to a month-major .npy file in place (header rewrite + tail write)."""
+    rows = np.ascontiguousarray(rows, dtype=np.float64)
+    with open(path, "r+b") as fh:
+        version, shape, fortran_order, dtype, offset = _read_header(fh)
+        if fortran_order or dtype != rows.dtype or shape[1:] != rows.shape[1:]:
+            raise IncompatibleRelease(f"{path} cannot take rows of shape {rows.shape}")
+        header = io.BytesIO()
+        new_shape = (shape[0] + rows.shape[0],) + tuple(shape[1:])
+        info = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": new_shape}
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(header, info)
+        else:
+            np.lib.format.write_array_header_2_0(header, info)
+
+        if header.tell() != offset:
+            # header grew past its padding, rare enough that a rewrite is fine
+            fh.seek(offset)
+            existing = np.frombuffer(fh.read(), dtype=dtype).reshape(shape)
+            fh.close()
+            np.save(path, np.concatenate([existing, rows]))
+            return
+        # data first, header last: until the header is rewritten readers still see the old shape
+        fh.seek(0, io.SEEK_END)
+        fh.write(rows.tobytes())
+        fh.flush()
+        fh.seek(0)
+        fh.write(header.getvalue())
+
+
+def patch_rows(path, positions, rows):
+    if not positions:
+        return
+    target = np.lib.format.open_memmap(path, mode="r+")
+    target[positions] = rows
+    target.flush()
+    del target
+
+
+def plan(meta_part, stored, frame):
+    """Work out new and revised months of one frame against its stored part."""
+    labels = meta_part["labels"]
+    if frame[LABEL_COLUMN].tolist() != labels:
+        if sorted(frame[LABEL_COLUMN]) != sorted(labels):
+            raise IncompatibleRelease("release has different rows than the snapshot")
+        frame = frame.set_index(LABEL_COLUMN).loc[labels].reset_index()
+
+    months = [col for col in frame.columns if col != LABEL_COLUMN]
+    old_months = meta_part["months"]
+    if months[:len(old_months)] != old_months:
+        raise IncompatibleRelease("release does not extend the snapshot's months")
+
+    values = frame[months].to_numpy(dtype=np.float64).T  # month-major like the snapshot
+    n_old = len(old_months)
+    same = np.isclose(stored[:n_old], values[:n_old], rtol=0, atol=TOLERANCE, equal_nan=True).all(axis=1)
+    revised = np.flatnonzero(~same).tolist()
+    return {
+        "months": months,
+        "revised": revised,
+        "new": list(range(n_old, len(months))),
+        "values": values,
+    }
+
+
+def ingest(df, dt, release, snapshot=RELEASE, snapshot_dir=SNAPSHOT_DIR):
+    """Apply one release to the named snapshot; returns what changed."""
+    target = snapshot_path(snapshot, snapshot_dir)
+    if not has_snapshot(snapshot, snapshot_dir):
+        write_snapshot(df, dt, snapshot, snapshot_dir)
+        return {"release": release, "snapshot": snapshot, "full_rewrite": True, "new": [], "revised": []}
+
+    meta = read_meta(target)
+    plans = {}
+    for name, frame in (("countries", df), ("regions", dt)):
+        stored = np.load(target / f"{name}.npy", mmap_mode="r")[:len(meta[name]["months"])]
+        plans[name] = plan(meta[name], stored, frame)
+
+    for name, part in plans.items():
+        values = part["values"]
+        patch_rows(target / f"{name}.npy", part["revised"], values[part["revised"]])
+        if part["new"]:
+            append_rows(target / f"{name}.npy", values[part["new"]])
+        meta[name]["months"] = part["months"]
+
+    months = plans["regions"]["months"]
+    revised = sorted(set(plans["countries"]["revised"]) | set(plans["regions"]["revised"]))
+    new = plans["regions"]["new"]
+    report = {
+        "release": release,
+        "snapshot": snapshot,
+        "full_rewrite": False,
+        "new": [months[p] for p in new],
+        "revised": [months[p] for p in revised],
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    meta["release"] = release
+    meta["releases"] = meta.get("releases", []) + [release]
+    meta["ingest_log"] = meta.get("ingest_log", []) + [report]
+    write_meta(target, meta)  # commit point
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append/patch one CBK release into the snapshot")
+    parser.add_argument("--release", required=True, help="processed release to ingest, e.g. apr26")
+    parser.add_argument("--data-dir", default=DATA_DIR, type=Path)
+    parser.add_argument("--snapshot", default=RELEASE, help="snapshot the app serves (REMITTANCE_RELEASE)")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, type=Path)
+    args = parser.parse_args(argv)
+
+    df, dt = load_csv(args.release, args.data_dir)
+    try:
+        report = ingest(df, dt, args.release, args.snapshot, args.snapshot_dir)
+    except IncompatibleRelease as exc:
+        print(f"{exc}; rebuilding the snapshot from {args.release}")
+        write_snapshot(df, dt, args.snapshot, args.snapshot_dir)
+        return
+    if report["full_rewrite"]:
+        print(f"no snapshot {args.snapshot} yet, wrote it from {args.release}")
+        return
+    print(f"{args.release} -> {args.snapshot}: {len(report['new'])} new month(s) {report['new']}, "
+          f"{len(report['revised'])} revised {report['revised']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Lean figure JSON: the same picture in far fewer bytes.
+
+Applied to every figure before it is serialized (figure_cache.serialize) unless
+REMITTANCE_LEAN_FIGURES=0:
+
+* the theme template is pruned to what the figure can use: trace defaults only
+  for trace types it has, subplot styling (axes, geo, polar, ...) only for
+  subplots it has. Plotly Express embeds the whole template in every figure,
+  which was about 7.5 kB of each of the nine payloads;
+* numeric arrays are rounded to ``DECIMALS`` places; values are thousands of
+  USD, so three decimals is already whole dollars;
+* ``customdata`` that no hover/text template refers to is dropped;
+* hierarchical traces (sunburst, ...) get short numeric ids, ``parents`` is
+  remapped to match. Ids are never shown, the labels are.
+
+Typed-array (base64) encodings are not emitted: they need plotly.js 2.28 and
+the pinned plotly 5.17 bundles 2.26.
+"""
+import os
+
+import numpy as np
+
+LEAN_FIGURES = os.environ.get("REMITTANCE_LEAN_FIGURES", "1") != "0"
+DECIMALS = 3
+
+# trace type -> template.layout keys its subplot needs
+CARTESIAN = {"xaxis", "yaxis"}
+SUBPLOTS = {
+    "bar": CARTESIAN, "scatter": CARTESIAN, "scattergl": CARTESIAN, "histogram": CARTESIAN,
+    "heatmap": CARTESIAN, "box": CARTESIAN, "violin": CARTESIAN,
+    "choropleth": {"geo"}, "scattergeo": {"geo"},
+    "sunburst": set(), "treemap": set(), "icicle": set(), "pie": set(), "indicator": set(),
+}
+SUBPLOT_KEYS = {"xaxis", "yaxis", "geo", "polar", "ternary", "scene", "mapbox"}
+HIERARCHICAL = {"sunburst", "treemap", "icicle"}
+
+
+def _round(value):
+    if isinstance(value, np.ndarray) and value.dtype.kind == "f":
+        return np.round(value, DECIMALS)
+    if isinstance(value, (list, tuple)) and value and all(isinstance(v, float) for v in value):
+        return np.round(np.asarray(value), DECIMALS)
+    if isinstance(value, dict):
+        return {key: _round(item) for key, item in value.items()}
+    return value
+
+
+def _prune_template(layout, trace_types):
+    template = layout.get("template")
+    if not template or not trace_types <= SUBPLOTS.keys():
+        return  # unknown trace type, keep everything
+    if "data" in template:
+        template["data"] = {kind: value for kind, value in template["data"].items() if kind in trace_types}
+    # an empty figure still draws default cartesian axes
+    needed = set().union(*(SUBPLOTS[kind] for kind in trace_types)) if trace_types else CARTESIAN
+    for key in SUBPLOT_KEYS - needed:
+        template.get("layout", {}).pop(key, None)
+
+
+def _short_ids(trace):
+    ids, parents = trace.get("ids"), trace.get("parents")
+    if ids is None or parents is None:
+        return
+    short = {node: str(i) for i, node in enumerate(ids)}
+    trace["ids"] = list(short.values())
+    trace["parents"] = [short.get(parent, parent) for parent in parents]
+
+
+def lean(figure):
+    """Slim a ``fig.to_plotly_json()`` dict in place and return it."""
+    traces = figure.get("data", [])
+    for trace in traces:
+        templates = " ".join(str(trace.get(key, "")) for key in ("hovertemplate", "texttemplate"))
+        if "customdata" in trace and "customdata" not in templates:
+            del trace["customdata"]
+        if trace.get("type") in HIERARCHICAL:
+            _short_ids(trace)
+        for key, value in trace.items():
+            trace[key] = _round(value)
+    _prune_template(figure.get("layout", {}), {trace.get("type", "scatter") for trace in traces})
+    return figure
@@ -0,0 +1,105 @@
+"""Period aggregation: totals over any contiguous run of months.
+
+A period is resolved to month positions [start, stop) from the selected
+month: the month itself, quarter to date, calendar year to date, Kenyan
+fiscal year to date (July to June), a rolling window, or a custom first/last
+month from the range picker. Its totals for every country and for the region
+frame come from the cube's running sums (``AggregateCube.range_sums``), so a
+three year range costs the same two column reads as a single month.
+
+Periods that start before the first month of the data are cut at it. The
+month columns are consecutive calendar months, so "a year earlier" is twelve
+positions back.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+FISCAL_YEAR_START = 7  # the Kenyan fiscal year starts in July
+ROLLING_MONTHS = 12
+DEFAULT_PERIOD = "ytd"
+
+# period kind -> label of the picker
+PERIODS = {
+    "month": "MONTH",
+    "quarter": "QUARTER TO DATE",
+    "ytd": "YEAR TO DATE",
+    "fiscal": "FISCAL YEAR TO DATE (JUL-JUN)",
+    "rolling": f"ROLLING {ROLLING_MONTHS} MONTHS",
+    "custom": "CUSTOM RANGE",
+}
+
+
+@dataclass(frozen=True)
+class Period:
+    start: int  # first month position
+    stop: int   # one past the last month position
+    label: str  # "Jul 22 - Jan 23"
+
+
+def span_label(months, start, stop):
+    first, last = months[start].replace("_", " "), months[stop - 1].replace("_", " ")
+    return first if stop - start == 1 else f"{first} - {last}"
+
+
+def _period(data, start, stop):
+    start = max(start, 0)
+    return Period(start, stop, span_label(data.months, start, stop))
+
+
+def resolve(data, kind, month, first=None, last=None):
+    """The ``kind`` period ending at ``month``; ``first``/``last`` bound a custom range."""
+    i = data.position(month)
+    number = int(data.month_numbers[i])
+    if kind == "custom":
+        # a month missing from this dataset (an older vintage) falls back to its first or the selected month
+        start = data.month_index.get(first, 0)
+        end = data.month_index.get(last, i)
+        start, end = min(start, end), max(start, end)
+        return _period(data, start, end + 1)
+    offsets = {
+        "month": 0,
+        "quarter": (number - 1) % 3,
+        "ytd": number - 1,
+        "fiscal": (number - FISCAL_YEAR_START) % 12,
+        "rolling": ROLLING_MONTHS - 1,
+    }
+    if kind not in offsets:
+        raise ValueError(f"unknown period {kind!r}, expected one of {', '.join(PERIODS)}")
+    return _period(data, i - offsets[kind], i + 1)
+
+
+def comparison(data, kind, period):
+    """The period to compare with: the same months a year earlier, or for a
+    custom range the run of equal length just before it. None if the data does
+    not reach back that far."""
+    shift = period.stop - period.start if kind == "custom" else 12
+    if period.start - shift < 0:
+        return None
+    return _period(data, period.start - shift, period.stop - shift)
+
+
+def totals(data, period):
+    """(per-country totals, region total) of ``period``, two column reads of the running sums."""
+    return data.cube.range_sums(period.start, period.stop)
+
+
+def table(data, kind, period):
+    """Every country's total over ``period`` and its comparison period, largest first.
+
+    The frame behind the period CSV download, kept per tab in the server store.
+    """
+    values, _ = totals(data, period)
+    frame = pd.DataFrame({
+        "Region/Country": data.dimension.names,
+        "Region": data.dimension.regions,
+        period.label: values,
+    })
+    previous = comparison(data, kind, period)
+    if previous is not None:
+        before, _ = totals(data, previous)
+        frame[previous.label] = before
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frame["Change %"] = np.where(before > 0, (values - before) / before * 100, np.nan)
+    return frame.sort_values(period.label, ascending=False, ignore_index=True)
@@ -0,0 +1,117 @@
+"""Offline pre-render of the whole dashboard.
+
+The month set is small and known up front, so every panel of the dashboard
+can be produced once at build/deploy time and written to a compressed on-disk
+store:
+
+    python src/prerender.py --workers 4
+
+Files live under ``<store>/<dataset version>/<month>/<panel>.json.gz``; a new
+dataset gets a new version directory, so stale payloads are never served. At
+runtime each panel callback reads its stored payload and only builds figures
+live on a miss. When the ``brotli`` package is installed a ``.json.br``
+variant is written next to each file, and /payload (http_cache.py) sends
+whichever encoding the client accepts without compressing again.
+"""
+import argparse
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+from data_store import REPO_ROOT
+
+PRERENDER_DIR = Path(os.environ.get("REMITTANCE_PRERENDER_DIR", REPO_ROOT / "data" / "prerendered"))
+
+# Content-Encoding -> file suffix
+ENCODINGS = {"gzip": "gz", "br": "br"}
+
+
+class PayloadStore:
+    def __init__(self, root=PRERENDER_DIR):
+        self.root = Path(root)
+
+    def path(self, version, month, panel, encoding="gzip"):
+        return self.root / version / month / f"{panel}.json.{ENCODINGS[encoding]}"
+
+    def read_bytes(self, version, month, panel, encoding="gzip"):
+        """Compressed payload or None when the panel was not pre-rendered (in that encoding)."""
+        try:
+            return self.path(version, month, panel, encoding).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def read(self, version, month, panel):
+        raw = self.read_bytes(version, month, panel)
+        return gzip.decompress(raw).decode() if raw is not None else None
+
+    def write(self, version, month, panel, payload):
+        raw = payload.encode()
+        variants = {"gzip": lambda: gzip.compress(raw, compresslevel=9)}
+        if brotli is not None:
+            variants["br"] = lambda: brotli.compress(raw, quality=11)
+        # the gzip file goes last, it is the one read() and the live path check for
+        for encoding in sorted(variants, key=lambda name: name == "gzip"):
+            target = self.path(version, month, panel, encoding)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix(".tmp")
+            tmp.write_bytes(variants[encoding]())
+            os.replace(tmp, target)  # readers never see a half written file
+        return target
+
+
+def render_month(month):
+    # imported here so pool workers (and the app importing PayloadStore) avoid a cycle
+    import app
+
+    payloads, errors = {}, {}
+    for panel in app.PANELS:
+        try:
+            payloads[panel] = app.build_panel_json(app.DATA.current(), panel, month)
+        except Exception as exc:  # left to the live path, which reports the error to the browser
+            errors[panel] = f"{type(exc).__name__}: {exc}"
+    return month, payloads, errors
+
+
+def prerender(store, workers=1):
+    import app
+
+    data = app.DATA.current()
+    app.forecasts(data)  # fitted and stored once (forecast.py), the pool workers read it back
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_month, data.months))
+    else:
+        results = [render_month(month) for month in data.months]
+
+    written, failed = 0, {}
+    for month, payloads, errors in results:
+        for panel, payload in payloads.items():
+            store.write(data.version, month, panel, payload)
+        written += len(payloads)
+        failed.update({(month, panel): error for panel, error in errors.items()})
+    return data.version, written, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render every month's dashboard payload")
+    parser.add_argument("--out", default=PRERENDER_DIR, type=Path, help="payload store directory")
+    parser.add_argument("--workers", default=os.cpu_count() or 1, type=int, help="processes to fan out over")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    version, count, failed = prerender(PayloadStore(args.out), args.workers)
+    print(f"pre-rendered {count} panels of dataset {version} into {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
+    for (month, panel), error in failed.items():
+        print(f"  skipped {month}/{panel}: {error}")
+
+
+if __name__ == "__main__":
+    main()
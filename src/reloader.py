@@ -0,0 +1,113 @@
+"""Hot reload of the dataset without restarting the server.
+
+``DatasetHolder`` is a versioned pointer to the current ``RemittanceDataset``
+(built by the first ``current()`` call when it is given a loader). Callbacks
+read it once at the start (``DATA.current()``) and use that object
+for the whole request, so a swap never changes data under a request in
+flight. ``SnapshotWatcher`` polls the snapshot's meta.json (or the processed
+CSVs when there is no snapshot) from a background thread, builds the new
+dataset off the request path with ``dataset.refresh`` and swaps it in.
+"""
+import logging
+import os
+import threading
+
+from data_store import DATA_DIR, RELEASE, SNAPSHOT_DIR, csv_names, has_snapshot, load_frames, snapshot_path
+from dataset import refresh
+
+RELOAD_INTERVAL = float(os.environ.get("REMITTANCE_RELOAD_INTERVAL", 60))  # seconds, 0 switches it off
+
+log = logging.getLogger(__name__)
+
+
+class DatasetHolder:
+    def __init__(self, data=None, load=None):
+        # either a dataset, or ``load`` to build it on the first current() call
+        self._data = data
+        self._load = load
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def current(self):
+        # a single attribute read, the object it returns is immutable
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._load()
+                data = self._data
+        return data
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def swap(self, data):
+        with self._lock:
+            previous, self._data = self._data, data
+            self._generation += 1
+        return previous
+
+
+def source_signature(release=RELEASE, data_dir=DATA_DIR, snapshot_dir=SNAPSHOT_DIR):
+    """Cheap fingerprint of whatever load_frames would read right now."""
+    if has_snapshot(release, snapshot_dir):
+        paths = [snapshot_path(release, snapshot_dir) / "meta.json"]
+    else:
+        paths = [data_dir / name for name in csv_names(release)]
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append((str(path), None))
+            continue
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class SnapshotWatcher(threading.Thread):
+    def __init__(self, holder, interval=RELOAD_INTERVAL, release=RELEASE,
+                 data_dir=DATA_DIR, snapshot_dir=SNAPSHOT_DIR):
+        super().__init__(name="snapshot-watcher", daemon=True)
+        self.holder = holder
+        self.interval = interval
+        self.source = {"release": release, "data_dir": data_dir, "snapshot_dir": snapshot_dir}
+        self._signature = source_signature(**self.source)
+        self._stopped = threading.Event()
+
+    def check(self):
+        """Reload when the source changed; returns True when a new dataset was swapped in."""
+        signature = source_signature(**self.source)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        current = self.holder.current()
+        data = refresh(current, *load_frames(**self.source))
+        if data.version == current.version:
+            return False
+        self.holder.swap(data)
+        log.info("dataset reloaded: %s -> %s (%d months)", current.version, data.version, len(data.months))
+        return True
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception:  # a half copied file must not kill the watcher, try again next round
+                log.exception("dataset reload failed")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_watcher(holder, interval=RELOAD_INTERVAL):
+    if interval <= 0:
+        return None
+    watcher = SnapshotWatcher(holder, interval)
+    watcher.start()
+    return watcher
@@ -0,0 +1,190 @@
+"""Server-side store for derived frames, so callbacks pass handles instead of data.
+
+Anything a callback derives from the dataset (a year's long frame, the
+forecasts, a period comparison) is kept on the server under a handle
+``<dataset version>:<session>:<name>``; only the handle travels through
+``dcc.Store`` or a request body. ``session`` is the per-tab id the browser
+keeps in the "session-id" store, or ``SHARED`` for values every session can
+reuse. The period comparison is the per-tab one: its handle sits in the
+"period-selection" store and the CSV download reads the frame back by it.
+
+Two tiers:
+
+* an in-process LRU (``MemoryBackend``) in front of
+* an optional shared backend every gunicorn worker on the host sees: a
+  directory (``DiskBackend``) or a Redis server (``RedisBackend``, needs the
+  ``redis`` package).
+
+REMITTANCE_SERVER_STORE picks the shared backend: ``memory`` (default, none),
+``disk`` / ``disk:/some/dir`` or a ``redis://host:port/db`` URL.
+A value that was evicted everywhere is simply recomputed by the caller.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from data_store import REPO_ROOT
+
+SERVER_STORE = os.environ.get("REMITTANCE_SERVER_STORE", "memory")
+SERVER_STORE_SIZE = int(os.environ.get("REMITTANCE_SERVER_STORE_SIZE", 256))  # entries kept in process
+DISK_STORE_DIR = REPO_ROOT / "data" / "server_store"
+DISK_STORE_BYTES = 256 * 1024 * 1024
+TTL = 24 * 3600  # seconds a shared entry lives in Redis
+
+SHARED = "shared"
+
+
+class MemoryBackend:
+    """Bounded LRU of live objects, no serialization."""
+
+    def __init__(self, maxsize=SERVER_STORE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend:
+    """Pickled values in a directory, shared by every process on the host."""
+
+    def __init__(self, root=DISK_STORE_DIR, max_bytes=DISK_STORE_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._writes = 0
+
+    def _path(self, key):
+        return self.root / (hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+    def get(self, key):
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, raw):
+        target = self._path(key)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(raw)
+        os.replace(tmp, target)  # other workers see the old file or the new one
+        self._writes += 1
+        if self._writes % 64 == 0:
+            self._evict()
+
+    def _evict(self):
+        files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                       for entry in os.scandir(self.root) if entry.name.endswith(".pkl"))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:  # oldest first
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker got there first
+            total -= size
+
+
+class RedisBackend:
+    def __init__(self, url, ttl=TTL):
+        import redis  # optional, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, raw):
+        self.client.set(key, raw, ex=self.ttl)
+
+
+def shared_backend(spec=SERVER_STORE):
+    if spec == "memory":
+        return None
+    if spec == "disk" or spec.startswith("disk:"):
+        return DiskBackend(spec[5:] or DISK_STORE_DIR)
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(spec)
+    raise ValueError(f"unknown REMITTANCE_SERVER_STORE {spec!r}")
+
+
+def make_handle(version, session, name):
+    return f"{version}:{session or SHARED}:{name}"
+
+
+class ServerStore:
+    def __init__(self, local=None, shared=None):
+        self.local = local if local is not None else MemoryBackend()
+        self.shared = shared
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()  # gthread workers look values up from many threads
+
+    @classmethod
+    def from_env(cls):
+        return cls(MemoryBackend(), shared_backend())
+
+    def put(self, version, session, name, value):
+        """Keep ``value`` and return its handle."""
+        handle = make_handle(version, session, name)
+        self.local.set(handle, value)
+        if self.shared is not None:
+            self.shared.set(handle, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        return handle
+
+    def get(self, handle, session=None):
+        """Value behind ``handle`` or None when it is gone (or belongs to another session)."""
+        owner = handle.split(":")[1] if handle.count(":") >= 2 else None
+        if owner != SHARED and owner != session:
+            return None
+        value = self.local.get(handle)
+        if value is None and self.shared is not None:
+            raw = self.shared.get(handle)
+            if raw is not None:
+                value = pickle.loads(raw)  # our own writes only, the backend is not exposed
+                self.local.set(handle, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get_or_compute(self, version, session, name, compute):
+        value = self.get(make_handle(version, session, name), session)
+        if value is None:
+            value = compute()
+            self.put(version, session, name, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "local_entries": len(self.local),
+                "shared": type(self.shared).__name__ if self.shared is not None else None,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,197 @@
+"""Per-panel timing, metrics and on-demand profiling.
+
+Every dashboard panel is produced by its own callback; ``timed(name)`` wraps
+the work of one panel and ``timed(name, phase)`` the phases inside it:
+
+* ``compute``   finding the payload (dataset lookup, pre-rendered store),
+* ``figure``    the ``create_*`` builder (data selection plus Plotly figure construction),
+* ``serialize`` encoding the figure to JSON,
+* ``decode``    turning the payload into the callback's return value.
+
+Each sample records wall time, CPU time of the calling thread and, when
+tracemalloc is running (REMITTANCE_TRACE_ALLOC=1), the peak of traced memory
+above the starting point. tracemalloc is process wide, so with concurrent
+requests the allocation figure is approximate.
+
+The numbers are kept in a bounded window per (panel, phase) for quantiles,
+plus running sums and counts, and are served
+
+* as JSON on /panel-timings,
+* in Prometheus text format (summaries with p50/p95/p99) on /metrics,
+* as a ``Server-Timing`` header on each ``_dash-update-component`` response,
+  so the browser devtools show the phases next to the request.
+
+With REMITTANCE_PROFILING=1 a request carrying ``X-Profile: 1`` is run under
+cProfile; the stats are written to PROFILE_DIR and the file name is returned
+in the ``X-Profile-Dump`` header.
+"""
+import cProfile
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from flask import Response, g, has_request_context, request
+
+from data_store import REPO_ROOT
+
+WINDOW = 500  # samples kept per (panel, phase)
+TOTAL = "total"
+QUANTILES = (0.5, 0.95, 0.99)
+
+PROFILING = os.environ.get("REMITTANCE_PROFILING", "0") == "1"
+PROFILE_DIR = Path(os.environ.get("REMITTANCE_PROFILE_DIR", REPO_ROOT / "data" / "profiles"))
+PROFILE_HEADER = "X-Profile"
+
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))   # (name, phase) -> (wall_ms, cpu_ms, alloc_bytes)
+_totals = defaultdict(lambda: [0, 0.0, 0.0, 0])          # (name, phase) -> count, wall_ms, cpu_ms, alloc_bytes
+_lock = threading.Lock()
+_peaks = threading.local()  # open timed() blocks of this thread, innermost last
+
+
+@contextmanager
+def timed(name, phase=TOTAL):
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        stack = _peaks.__dict__.setdefault("stack", [])
+        start_mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        stack.append(start_mem)
+    start_cpu = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        cpu_ms = (time.thread_time() - start_cpu) * 1000
+        alloc = 0
+        if tracing:
+            # an inner block resets the peak, so it hands its own peak up to the enclosing one
+            peak = max(tracemalloc.get_traced_memory()[1], stack.pop())
+            alloc = max(0, peak - start_mem)
+            if stack:
+                stack[-1] = max(stack[-1], peak)
+        key = (name, phase)
+        with _lock:
+            _samples[key].append((elapsed_ms, cpu_ms, alloc))
+            total = _totals[key]
+            total[0] += 1
+            total[1] += elapsed_ms
+            total[2] += cpu_ms
+            total[3] += alloc
+        if has_request_context():
+            label = name if phase == TOTAL else f"{name}.{phase}"
+            g.setdefault("server_timing", []).append((label, elapsed_ms))
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _snapshot():
+    with _lock:
+        return ({key: list(values) for key, values in _samples.items()},
+                {key: list(values) for key, values in _totals.items()})
+
+
+def report():
+    samples, _ = _snapshot()
+    out = defaultdict(dict)
+    for (name, phase), values in samples.items():
+        if not values:
+            continue
+        wall = sorted(v[0] for v in values)
+        cpu = sorted(v[1] for v in values)
+        stats = {
+            "count": len(wall),
+            "mean_ms": round(sum(wall) / len(wall), 3),
+            "p50_ms": round(_percentile(wall, 0.50), 3),
+            "p95_ms": round(_percentile(wall, 0.95), 3),
+            "p99_ms": round(_percentile(wall, 0.99), 3),
+            "max_ms": round(wall[-1], 3),
+            "cpu_p50_ms": round(_percentile(cpu, 0.50), 3),
+        }
+        if tracemalloc.is_tracing():
+            stats["alloc_p50_bytes"] = _percentile(sorted(v[2] for v in values), 0.50)
+        if phase == TOTAL:
+            out[name].update(stats)
+        else:
+            out[name].setdefault("phases", {})[phase] = stats
+    return dict(out)
+
+
+def _label_value(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def metrics_text():
+    """All samples as Prometheus summaries."""
+    samples, totals = _snapshot()
+    series = (
+        ("remittance_panel_seconds", "Wall time per panel callback phase", 0, 1e-3),
+        ("remittance_panel_cpu_seconds", "Thread CPU time per panel callback phase", 1, 1e-3),
+        ("remittance_panel_alloc_bytes", "Peak traced allocation per panel callback phase", 2, 1),
+    )
+    lines = []
+    for metric, help_text, column, scale in series:
+        if column == 2 and not tracemalloc.is_tracing():
+            continue
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} summary"]
+        for (name, phase), values in sorted(samples.items()):
+            if not values:
+                continue
+            labels = f'panel="{_label_value(name)}",phase="{_label_value(phase)}"'
+            ordered = sorted(v[column] for v in values)
+            for q in QUANTILES:
+                lines.append(f'{metric}{{{labels},quantile="{q}"}} {_percentile(ordered, q) * scale:.6g}')
+            count, *sums = totals[(name, phase)]
+            lines.append(f"{metric}_sum{{{labels}}} {sums[column] * scale:.6g}")
+            lines.append(f"{metric}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _profile_name():
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return f"{stamp}-{os.getpid()}-{threading.get_ident()}-{re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_')}.prof"
+
+
+def start_profile():
+    # flask before_request hook, opt-in twice: the environment and the request header
+    if PROFILING and request.headers.get(PROFILE_HEADER) == "1":
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def finish_profile(response):
+    # flask after_request hook, runs before the response is sent
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        target = PROFILE_DIR / _profile_name()
+        profiler.dump_stats(target)
+        response.headers["X-Profile-Dump"] = target.name
+    return response
+
+
+def add_server_timing(response):
+    # flask after_request hook
+    entries = g.pop("server_timing", None) if has_request_context() else None
+    if entries:
+        response.headers["Server-Timing"] = ", ".join(f"{name};dur={ms:.1f}" for name, ms in entries)
+    return response
+
+
+def install(server):
+    if os.environ.get("REMITTANCE_TRACE_ALLOC", "0") == "1" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    server.before_request(start_profile)
+    server.after_request(finish_profile)
+    server.after_request(add_server_timing)
+    server.add_url_rule("/panel-timings", "panel_timings", lambda: report())
+    server.add_url_rule("/metrics", "metrics",
+                        lambda: Response(metrics_text(), mimetype="text/plain; version=0.0.4"))
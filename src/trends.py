@@ -0,0 +1,54 @@
+"""Top-N trend lines over a trailing window, as a fixed number of traces.
+
+The trend chart used to sort every country by a fresh 12 month total and add
+one ``go.Scatter`` per country, so drawing N countries meant N SVG traces.
+Here the window sums come from the cube's running sums (or its precomputed
+12 month sums), the top N are picked with a partial sort, and the lines are
+packed into at most ``LINE_GROUPS`` WebGL traces: the countries of a group
+are laid end to end with a NaN point between them, which breaks the line.
+The browser's work per figure then stays the same whether N is 5 or 500;
+only the arrays get longer.
+"""
+import numpy as np
+
+TREND_TOP_N = 5
+TREND_WINDOW = 12
+TOP_N_CHOICES = (5, 10, 20, 50, 100, 250, 500)
+WINDOW_CHOICES = (3, 6, 12, 24, 36)
+LINE_GROUPS = 10  # one per colour of the template colorway
+
+
+def window_sums(cube, i, window):
+    """(countries,) sums of the ``window`` months ending at position ``i``, NaN counted as 0."""
+    if window == cube.window:
+        return cube.trailing[:, i]
+    return cube.range_sums(i - window + 1, i + 1)[0]
+
+
+def top_rows(sums, n):
+    """Rows of the ``n`` largest sums, descending; only those ``n`` are sorted."""
+    keys = -np.where(np.isnan(sums), -np.inf, sums)
+    n = max(0, min(int(n), len(keys)))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    rows = np.argpartition(keys, n - 1)[:n] if n < len(keys) else np.arange(len(keys))
+    return rows[np.argsort(keys[rows], kind="stable")]
+
+
+def packed_lines(values, months, labels, groups=LINE_GROUPS):
+    """Pack the rows of ``values`` (rows, months) into ``groups`` NaN-separated lines.
+
+    Row k goes to group ``k % groups``, so for ``len(values) <= groups`` every
+    line is its own trace. Returns a list of (x, y, text, members) per group,
+    ``text`` is the row's label for every point (for the hover).
+    """
+    n_rows, n_months = values.shape
+    x_row = np.array(list(months) + [None], dtype=object)
+    lines = []
+    for group in range(min(groups, n_rows)):
+        members = np.arange(group, n_rows, groups)
+        y = np.full((len(members), n_months + 1), np.nan)
+        y[:, :n_months] = values[members]
+        text = np.repeat(np.array([labels[m] for m in members], dtype=object), n_months + 1)
+        lines.append((np.tile(x_row, len(members)), y.ravel(), text, members))
+    return lines
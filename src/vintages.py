@@ -0,0 +1,227 @@
+"""Vintage-aware revision store: every CBK release, without full copies.
+
+Each release restates a few earlier months and adds one or two new ones, so
+keeping apr25/sep25/dec25/feb26 as separate tables stores almost the same
+history four times. ``VintageStore`` keeps, per table, one log of
+(release, cell, value) entries: a cell is written when a release first
+reports it and again only when a later release changes it. Size therefore
+grows with the number of revisions, not with releases x history.
+
+* ``frames(release)`` rebuilds the (df, dt) pair as it was published in that
+  release (last write per cell among the entries up to that release);
+* ``revisions(old, new)`` lists the values ``new`` restated relative to ``old``.
+
+The store is written by batch_import.py next to the snapshot as vintages.npz,
+or built from the processed CSVs:
+
+    python src/vintages.py --build apr25 sep25 dec25 feb26
+    python src/vintages.py --diff dec25 feb26
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+
+from data_store import DATA_DIR, LABEL_COLUMN, RELEASE, SNAPSHOT_DIR, load_csv, snapshot_path
+from ingest import TOLERANCE
+
+PARTS = ("countries", "regions")
+VINTAGE_FILE = "vintages.npz"
+
+
+def vintage_path(snapshot=RELEASE, snapshot_dir=SNAPSHOT_DIR):
+    return snapshot_path(snapshot, snapshot_dir) / VINTAGE_FILE
+
+
+def entry_from_frames(df, dt):
+    """Tables of one release in the (labels, values) form ``VintageStore.build`` takes."""
+    # the label column is always first (region_apr25.csv calls it "Region")
+    months = list(dt.columns[1:])
+    return {
+        "months": months,
+        "countries": (df.iloc[:, 0].tolist(), df[months].to_numpy(dtype=np.float64)),
+        "regions": (dt.iloc[:, 0].tolist(), dt[months].to_numpy(dtype=np.float64)),
+    }
+
+
+class VintageStore:
+    def __init__(self, releases, months, n_months, parts):
+        self.releases = list(releases)     # oldest first
+        self.months = list(months)         # union of all months, chronological
+        self.n_months = np.asarray(n_months)  # months covered by each release (always a prefix)
+        # part -> {"labels", "present" (releases, rows), "release", "cell", "value"}
+        self.parts = parts
+        self._release_pos = {release: i for i, release in enumerate(self.releases)}
+
+    @classmethod
+    def build(cls, vintages):
+        """Store for ``[(release, entry), ...]`` in publication order (see entry_from_frames)."""
+        longest = max((entry["months"] for _, entry in vintages), key=len)
+        for _, entry in vintages:
+            if entry["months"] != longest[:len(entry["months"])]:
+                raise ValueError("every release must cover a prefix of the same month sequence")
+        n_cols = len(longest)
+        parts = {}
+        for part in PARTS:
+            labels = []
+            for _, entry in vintages:
+                labels += [label for label in entry[part][0] if label not in labels]
+            row_pos = {label: i for i, label in enumerate(labels)}
+            latest = np.full((len(labels), n_cols), np.nan)
+            seen = np.zeros(latest.shape, dtype=bool)
+            present = np.zeros((len(vintages), len(labels)), dtype=bool)
+            log = {"release": [], "cell": [], "value": []}
+
+            for r, (_, entry) in enumerate(vintages):
+                rows = np.array([row_pos[label] for label in entry[part][0]], dtype=np.intp)
+                values = entry[part][1]
+                n = values.shape[1]
+                present[r, rows] = True
+                old, known = latest[rows, :n], seen[rows, :n]
+                write = ~known | ~np.isclose(old, values, rtol=0, atol=TOLERANCE, equal_nan=True)
+                row_idx, col_idx = np.nonzero(write)
+                log["release"].append(np.full(len(row_idx), r, dtype=np.int32))
+                log["cell"].append((rows[row_idx] * n_cols + col_idx).astype(np.int64))
+                log["value"].append(values[row_idx, col_idx])
+                latest[rows, :n] = values
+                seen[rows, :n] = True
+
+            parts[part] = {"labels": labels, "present": present, **{k: np.concatenate(v) for k, v in log.items()}}
+        return cls([release for release, _ in vintages], longest,
+                   [len(entry["months"]) for _, entry in vintages], parts)
+
+    def position(self, release):
+        return self._release_pos[release]
+
+    def latest(self):
+        return self.releases[-1]
+
+    def as_of(self, part, release):
+        """(labels, values) of one table as published in ``release``."""
+        r = self.position(release)
+        store = self.parts[part]
+        n_cols = len(self.months)
+        upto = store["release"] <= r
+        cells, values = store["cell"][upto], store["value"][upto]
+        # entries are in release order: the last write of each cell is the first one reading backwards
+        last_cells, first_back = np.unique(cells[::-1], return_index=True)
+        table = np.full(len(store["labels"]) * n_cols, np.nan)
+        table[last_cells] = values[::-1][first_back]
+        table = table.reshape(len(store["labels"]), n_cols)[:, :self.n_months[r]]
+        rows = np.flatnonzero(store["present"][r])
+        return [store["labels"][i] for i in rows], table[rows]
+
+    def frames(self, release):
+        """(df, dt) exactly as ``release`` published them."""
+        import pandas as pd
+
+        months = self.months[:self.n_months[self.position(release)]]
+        frames = []
+        for part in PARTS:
+            labels, values = self.as_of(part, release)
+            frame = pd.DataFrame(values, columns=months)
+            frame.insert(0, LABEL_COLUMN, labels)
+            frames.append(frame)
+        return tuple(frames)
+
+    def revisions(self, old, new):
+        """Values ``new`` restated for months ``old`` already had, one row per cell."""
+        import pandas as pd
+
+        r_old, r_new = self.position(old), self.position(new)
+        first, last = sorted((r_old, r_new))
+        n_cols = len(self.months)
+        rows = []
+        for part in PARTS:
+            store = self.parts[part]
+            # only cells written after the earlier release can differ
+            between = (store["release"] > first) & (store["release"] <= last)
+            cells = np.unique(store["cell"][between])
+            cells = cells[cells % n_cols < self.n_months[first]]
+            if not len(cells):
+                continue
+            before = self._cells(part, r_old, cells)
+            after = self._cells(part, r_new, cells)
+            changed = ~np.isclose(before, after, rtol=0, atol=TOLERANCE, equal_nan=True)
+            for cell, a, b in zip(cells[changed], before[changed], after[changed]):
+                rows.append({"part": part, LABEL_COLUMN: store["labels"][cell // n_cols],
+                             "month": self.months[cell % n_cols], old: a, new: b})
+        return pd.DataFrame(rows, columns=["part", LABEL_COLUMN, "month", old, new])
+
+    def _cells(self, part, r, cells):
+        import pandas as pd
+
+        store = self.parts[part]
+        upto = store["release"] <= r
+        values = pd.Series(store["value"][upto]).groupby(store["cell"][upto]).last()
+        return values.reindex(cells).to_numpy()
+
+    def stats(self):
+        entries = sum(len(store["cell"]) for store in self.parts.values())
+        full = sum(
+            int(store["present"][r].sum()) * int(self.n_months[r])
+            for store in self.parts.values() for r in range(len(self.releases))
+        )
+        return {"releases": len(self.releases), "entries": entries, "full_copies": full,
+                "ratio": entries / full if full else 0.0}
+
+    def save(self, path):
+        arrays = {"releases": np.array(self.releases), "months": np.array(self.months), "n_months": self.n_months}
+        for part, store in self.parts.items():
+            arrays[f"{part}_labels"] = np.array(store["labels"])
+            for key in ("present", "release", "cell", "value"):
+                arrays[f"{part}_{key}"] = store[key]
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            parts = {
+                part: {
+                    "labels": arrays[f"{part}_labels"].tolist(),
+                    **{key: arrays[f"{part}_{key}"] for key in ("present", "release", "cell", "value")},
+                }
+                for part in PARTS
+            }
+            return cls(arrays["releases"].tolist(), arrays["months"].tolist(), arrays["n_months"], parts)
+
+
+def load_vintages(snapshot=RELEASE, snapshot_dir=SNAPSHOT_DIR):
+    """The store next to the served snapshot, or None when it was never built."""
+    path = vintage_path(snapshot, snapshot_dir)
+    return VintageStore.load(path) if path.exists() else None
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Build or query the vintage store")
+    parser.add_argument("--build", nargs="+", metavar="RELEASE", help="processed releases to store, oldest first")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="print values NEW revised against OLD")
+    parser.add_argument("--data-dir", default=DATA_DIR, type=Path)
+    parser.add_argument("--snapshot", default=RELEASE)
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, type=Path)
+    args = parser.parse_args(argv)
+
+    path = vintage_path(args.snapshot, args.snapshot_dir)
+    if args.build:
+        store = VintageStore.build([(release, entry_from_frames(*load_csv(release, args.data_dir)))
+                                    for release in args.build])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        store.save(path)
+        stats = store.stats()
+        print(f"{stats['releases']} releases in {path}: {stats['entries']} stored values "
+              f"instead of {stats['full_copies']} ({stats['ratio']:.1%})")
+    if args.diff:
+        store = VintageStore.load(path)
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(store.revisions(*args.diff).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
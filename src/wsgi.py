@@ -0,0 +1,17 @@
+"""Production WSGI entry point.
+
+    gunicorn -c src/gunicorn.conf.py wsgi:application
+
+With preload_app (on by default in gunicorn.conf.py) this module is imported
+once, in the gunicorn master: the dataset (memory-mapped snapshot plus the
+precomputed aggregates), the vintages, the figure template and the layout are
+built before the workers are forked and every worker shares those pages
+copy-on-write. ``gc.freeze()`` keeps them that way: without it the first full
+collection in each worker writes to every object header and copies the pages.
+"""
+import gc
+
+import app
+
+application = app.preload()
+gc.freeze()